@@ -1,124 +1,142 @@
 """
 Anthropic API client with retry logic and error handling
 """
+import asyncio
+import logging
+import random
+import re
+import string
+import threading
 import time
-from typing import Optional, Dict, Any, List
-from anthropic import Anthropic, APIError, RateLimitError
-from src.config import config
-
-
-class AnthropicClient:
-    """Enhanced Anthropic API client with retry logic"""
-
-    def __init__(self, api_key: Optional[str] = None):
-        """
-        Initialize the Anthropic client
-
-        Args:
-            api_key: Anthropic API key. If None, uses config value
-        """
-        self.api_key = api_key or config.ANTHROPIC_API_KEY
-        if not self.api_key:
-            raise ValueError("Anthropic API key is required")
-
-        self.client = Anthropic(api_key=self.api_key)
-        self.max_retries = config.MAX_RETRIES
-        self.retry_delay = config.RETRY_DELAY
-
-    def _retry_with_backoff(self, func, *args, **kwargs):
-        """
-        Execute function with exponential backoff retry logic
-
-        Args:
-            func: Function to execute
-            *args, **kwargs: Arguments to pass to function
-
-        Returns:
-            Function result
-
-        Raises:
-            APIError: If all retries fail
-        """
-        last_error = None
-
-        for attempt in range(self.max_retries):
-            try:
-                return func(*args, **kwargs)
-            except RateLimitError as e:
-                last_error = e
-                if attempt < self.max_retries - 1:
-                    delay = self.retry_delay * (2 ** attempt)
-                    time.sleep(delay)
-                    continue
-                raise
-            except APIError as e:
-                last_error = e
-                if attempt < self.max_retries - 1 and e.status_code >= 500:
-                    delay = self.retry_delay * (2 ** attempt)
-                    time.sleep(delay)
-                    continue
-                raise
-
-        raise last_error
-
-    def create_message(
-        self,
-        prompt: str,
-        system_prompt: Optional[str] = None,
-        model: Optional[str] = None,
-        max_tokens: Optional[int] = None,
-        temperature: Optional[float] = None,
-    ) -> str:
-        """
-        Create a message using Claude
-
-        Args:
-            prompt: User prompt
-            system_prompt: System prompt (optional)
-            model: Model to use (defaults to config)
-            max_tokens: Maximum tokens (defaults to config)
-            temperature: Temperature (defaults to config)
-
-        Returns:
-            Response text from Claude
-        """
-        model = model or config.DEFAULT_MODEL
-        max_tokens = max_tokens or config.MAX_TOKENS
-        temperature = temperature or config.TEMPERATURE
-
-        def _create():
-            kwargs = {
-                "model": model,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "messages": [{"role": "user", "content": prompt}],
-            }
-
-            if system_prompt:
-                kwargs["system"] = system_prompt
-
-            response = self.client.messages.create(**kwargs)
-            return response.content[0].text
-
-        return self._retry_with_backoff(_create)
-
-    def analyze_prompt(
-        self,
-        prompt_to_analyze: str,
-        analysis_type: str = "general"
-    ) -> str:
-        """
-        Analyze a prompt using Claude with specialized meta-prompts
-
-        Args:
-            prompt_to_analyze: The prompt to analyze
-            analysis_type: Type of analysis ('clarity', 'completeness', 'efficiency', 'safety', 'general')
-
-        Returns:
-            Analysis result
-        """
-        meta_prompts = {
-            "clarity": """You are an expert in prompt engineering. Analyze the following system prompt for CLARITY and AMBIGUITY.
+import weakref
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, Iterator, List, Tuple, Union
+from src.config import get_config
+from src.api.response_cache import response_cache, make_cache_key, is_cacheable
+from src.api.rate_limiter import rate_limiter, estimate_tokens
+from src.api.semantic_cache import semantic_cache
+
+if TYPE_CHECKING:
+    from anthropic import Anthropic, AsyncAnthropic
+
+logger = logging.getLogger(__name__)
+
+SystemPrompt = Union[str, List[Dict[str, Any]]]
+
+# SDK clients are shared per API key so connections (and TLS sessions) stay
+# warm across AnthropicClient instances and Streamlit reruns.
+_HTTP_LIMITS = {"max_connections": 100, "max_keepalive_connections": 50}
+_CLIENT_POOL: Dict[str, "Anthropic"] = {}
+_ASYNC_CLIENT_POOL: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncAnthropic]]" = (
+    weakref.WeakKeyDictionary()
+)
+_POOL_LOCK = threading.Lock()
+
+# Caps in-flight async requests; asyncio primitives are loop-bound, so there
+# is one semaphore per event loop.
+_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Body of each "VARIANT N:" block between its "---" fences. Blank lines and
+# stray whitespace around the fences are tolerated, and a missing closing
+# fence ends the body at the next header or the end of the text.
+_VARIANT_RE = re.compile(
+    r"^[ \t]*VARIANT\s*\d+:[ \t]*\n\s*^[ \t]*---[ \t]*\n(.*?)"
+    r"(?:\n[ \t]*---[ \t]*$|(?=\n\s*VARIANT\s*\d+:)|\Z)",
+    re.DOTALL | re.MULTILINE
+)
+
+
+def _sdk():
+    """
+    Import the anthropic SDK on first use
+
+    The SDK (and httpx under it) is slow to import, so it is kept off the
+    app's startup path until a client is actually needed.
+    """
+    import anthropic
+    return anthropic
+
+
+def _get_pooled_client(api_key: str) -> "Anthropic":
+    """Return the process-wide Anthropic client for an API key"""
+    with _POOL_LOCK:
+        client = _CLIENT_POOL.get(api_key)
+        if client is None:
+            import httpx
+            sdk = _sdk()
+            client = sdk.Anthropic(
+                api_key=api_key,
+                http_client=sdk.DefaultHttpxClient(http2=True, limits=httpx.Limits(**_HTTP_LIMITS))
+            )
+            _CLIENT_POOL[api_key] = client
+        return client
+
+
+def _get_pooled_async_client(api_key: str) -> "AsyncAnthropic":
+    """
+    Return the AsyncAnthropic client for an API key on the running loop
+
+    Async connections are tied to the loop that opened them, so the pool is
+    scoped per event loop. Outside a loop an unpooled client is returned.
+    """
+    sdk = _sdk()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return sdk.AsyncAnthropic(api_key=api_key)
+
+    with _POOL_LOCK:
+        clients = _ASYNC_CLIENT_POOL.setdefault(loop, {})
+        client = clients.get(api_key)
+        if client is None:
+            import httpx
+            client = sdk.AsyncAnthropic(
+                api_key=api_key,
+                http_client=sdk.DefaultAsyncHttpxClient(http2=True, limits=httpx.Limits(**_HTTP_LIMITS))
+            )
+            clients[api_key] = client
+        return client
+
+
+def release_api_key(api_key: str):
+    """
+    Evict and close the pooled SDK clients built for an API key
+
+    Call when a key is replaced so its clients and their connection pools
+    don't live on for the rest of the process. Async clients are closed on
+    the loop that owns them when it is still running.
+    """
+    with _POOL_LOCK:
+        client = _CLIENT_POOL.pop(api_key, None)
+        async_clients = [
+            (loop, clients.pop(api_key))
+            for loop, clients in list(_ASYNC_CLIENT_POOL.items())
+            if api_key in clients
+        ]
+        _WARMED_KEYS.discard(api_key)
+
+    if client is not None:
+        client.close()
+    for loop, async_client in async_clients:
+        if loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(async_client.close(), loop)
+
+
+def cached_system(*texts: str) -> List[Dict[str, Any]]:
+    """
+    Wrap system text in blocks marked for prompt caching
+
+    Each text becomes its own block with a cache breakpoint, so put the most
+    stable text first. The API allows at most four breakpoints per request.
+    """
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}} for text in texts]
+
+
+# Analysis rubrics, one per analysis type. Built once at import; the
+# prompt under analysis is never part of these (see _build_analysis_request).
+_META_PROMPTS = {
+    "clarity": """You are an expert in prompt engineering. Analyze the system prompt provided by the user for CLARITY and AMBIGUITY.
 
 Evaluate:
 1. Are instructions clear and unambiguous?
@@ -131,11 +149,6 @@ Provide:
 - Specific issues found
 - Concrete suggestions for improvement
 
-System prompt to analyze:
----
-{prompt}
----
-
 Respond in this format:
 CLARITY SCORE: [0-100]
 
@@ -145,7 +158,7 @@ ISSUES FOUND:
 SUGGESTIONS:
 [Concrete recommendations to improve clarity]
 """,
-            "completeness": """You are an expert in prompt engineering. Analyze the following system prompt for COMPLETENESS and ROBUSTNESS.
+    "completeness": """You are an expert in prompt engineering. Analyze the system prompt provided by the user for COMPLETENESS and ROBUSTNESS.
 
 Evaluate:
 1. Are edge cases handled?
@@ -158,11 +171,6 @@ Provide:
 - Missing elements
 - Edge cases not covered
 
-System prompt to analyze:
----
-{prompt}
----
-
 Respond in this format:
 COMPLETENESS SCORE: [0-100]
 
@@ -175,7 +183,7 @@ EDGE CASES NOT HANDLED:
 SUGGESTIONS:
 [Concrete recommendations to improve completeness]
 """,
-            "efficiency": """You are an expert in prompt engineering. Analyze the following system prompt for EFFICIENCY and TOKEN USAGE.
+    "efficiency": """You are an expert in prompt engineering. Analyze the system prompt provided by the user for EFFICIENCY and TOKEN USAGE.
 
 Evaluate:
 1. Is there unnecessary verbosity?
@@ -188,11 +196,6 @@ Provide:
 - Redundancies found
 - Optimization suggestions
 
-System prompt to analyze:
----
-{prompt}
----
-
 Respond in this format:
 EFFICIENCY SCORE: [0-100]
 
@@ -202,7 +205,7 @@ REDUNDANCIES:
 OPTIMIZATION OPPORTUNITIES:
 [Specific ways to reduce tokens while maintaining effectiveness]
 """,
-            "safety": """You are an expert in AI safety and prompt engineering. Analyze the following system prompt for SAFETY and ETHICAL CONSIDERATIONS.
+    "safety": """You are an expert in AI safety and prompt engineering. Analyze the system prompt provided by the user for SAFETY and ETHICAL CONSIDERATIONS.
 
 Evaluate:
 1. Are there potential misuse vectors?
@@ -215,11 +218,6 @@ Provide:
 - Potential risks
 - Recommended safeguards
 
-System prompt to analyze:
----
-{prompt}
----
-
 Respond in this format:
 SAFETY SCORE: [0-100]
 
@@ -232,7 +230,7 @@ MISSING SAFEGUARDS:
 SUGGESTIONS:
 [Concrete recommendations to improve safety]
 """,
-            "general": """You are an expert in prompt engineering. Provide a comprehensive analysis of the following system prompt.
+    "general": """You are an expert in prompt engineering. Provide a comprehensive analysis of the system prompt provided by the user.
 
 Evaluate across multiple dimensions:
 1. Clarity and precision
@@ -246,11 +244,6 @@ Provide:
 - Weaknesses
 - Prioritized recommendations
 
-System prompt to analyze:
----
-{prompt}
----
-
 Respond in this format:
 OVERALL SCORE: [0-100]
 
@@ -265,159 +258,977 @@ PRIORITY RECOMMENDATIONS:
 2. [Second priority]
 3. [Third priority]
 """
-        }
+}
+
+# All rubrics joined into one "knowledge base" system block, so every analysis
+# type can share a single cached prefix. It is only sent once it reaches the
+# analysis model's minimum cacheable prefix (see _shares_analysis_rubrics);
+# below that (~800 tokens today) caching does nothing and each call sends just
+# the rubric it needs.
+_ANALYSIS_KNOWLEDGE_BASE = (
+    "You evaluate system prompts. Each request names one analysis type and "
+    "includes the system prompt to analyze. Apply only the rubric for that "
+    "analysis type below and respond exactly in its format.\n\n"
+    + "\n".join(
+        f"=== ANALYSIS TYPE: {analysis_type} ===\n{rubric}"
+        for analysis_type, rubric in _META_PROMPTS.items()
+    )
+)
+_ANALYSIS_SYSTEM = cached_system(_ANALYSIS_KNOWLEDGE_BASE)
+_RUBRIC_SYSTEMS = {
+    analysis_type: [{"type": "text", "text": rubric}]
+    for analysis_type, rubric in _META_PROMPTS.items()
+}
+_ANALYSIS_USER_TEMPLATE = string.Template(
+    "Analysis type: $analysis_type\n\nSystem prompt to analyze:\n---\n$prompt\n---"
+)
+
+# API keys whose analysis cache has already been warmed in this process
+_WARMED_KEYS: set = set()
+
+# Shortest prefix (tokens) the API will cache, by model family substring;
+# models not listed use _DEFAULT_MIN_CACHEABLE_TOKENS
+_MIN_CACHEABLE_TOKENS = {"haiku": 2048}
+_DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+
+
+def _min_cacheable_tokens(model: str) -> int:
+    """Minimum cacheable prompt prefix for a model"""
+    for family, tokens in _MIN_CACHEABLE_TOKENS.items():
+        if family in model:
+            return tokens
+    return _DEFAULT_MIN_CACHEABLE_TOKENS
+
+
+def _shares_analysis_rubrics(model: str) -> bool:
+    """Whether the combined rubric block is long enough for ``model`` to cache"""
+    return estimate_tokens(_ANALYSIS_KNOWLEDGE_BASE) >= _min_cacheable_tokens(model)
+
+# The criteria and instructions are the same for every response set judged
+# on a test case, so they go in a cached system block ahead of the responses.
+_COMPARISON_SYSTEM_TEMPLATE = string.Template("""You are an expert evaluator. Compare the responses provided by the user based on these criteria:
+
+$criteria
 
-        meta_prompt = meta_prompts.get(analysis_type, meta_prompts["general"])
-        analysis_prompt = meta_prompt.format(prompt=prompt_to_analyze)
+Provide:
+1. Ranking from best to worst
+2. Specific strengths and weaknesses of each
+3. Overall recommendation
 
-        return self.create_message(
-            prompt=analysis_prompt,
-            model=config.ANALYSIS_MODEL
-        )
+Format:
+RANKING:
+1. [Name] - [Brief reason]
+2. [Name] - [Brief reason]
+...
 
-    def generate_variants(
-        self,
-        original_prompt: str,
-        optimization_focus: str = "balanced",
-        num_variants: int = 3
-    ) -> List[str]:
-        """
-        Generate optimized variants of a prompt
+DETAILED ANALYSIS:
+[Response name]: [Strengths] | [Weaknesses]
+...
 
-        Args:
-            original_prompt: Original prompt to optimize
-            optimization_focus: What to optimize for ('clarity', 'conciseness', 'robustness', 'balanced')
-            num_variants: Number of variants to generate
+RECOMMENDATION:
+[Which response is best and why]
+""")
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the concurrency semaphore for the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _POOL_LOCK:
+        semaphore = _SEMAPHORES.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(get_config().MAX_CONCURRENCY)
+            _SEMAPHORES[loop] = semaphore
+        return semaphore
+
+
+def _build_analysis_request(prompt_to_analyze: str, analysis_type: str) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Build the system blocks and user message used to analyze a prompt
+
+    Once the combined rubrics reach the analysis model's minimum cacheable
+    prefix they go into one shared system block marked for Anthropic prompt
+    caching; until then only the requested type's rubric is sent, uncached.
+    The analysis type and the prompt under analysis travel in the user
+    message. Shared by the sync and async clients so both send identical
+    requests.
+
+    Args:
+        prompt_to_analyze: The prompt to analyze
+        analysis_type: Type of analysis ('clarity', 'completeness', 'efficiency', 'safety', 'general')
+
+    Returns:
+        Tuple of (system blocks, user message)
+    """
+    if analysis_type not in _META_PROMPTS:
+        analysis_type = "general"
+    user_message = _ANALYSIS_USER_TEMPLATE.substitute(analysis_type=analysis_type, prompt=prompt_to_analyze)
+    if _shares_analysis_rubrics(get_config().ANALYSIS_MODEL):
+        return _ANALYSIS_SYSTEM, user_message
+    return _RUBRIC_SYSTEMS[analysis_type], user_message
+
+
+def _log_cache_usage(response) -> None:
+    """Log prompt-cache hits/writes reported by the API"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    if cache_read or cache_write:
+        logger.debug("Prompt cache: %d tokens read, %d tokens written", cache_read, cache_write)
+
+
+def _use_semantic_cache() -> bool:
+    """Semantic cache is opt-in and only for low-temperature analyses"""
+    return get_config().ENABLE_SEMANTIC_CACHE and is_cacheable(get_config().TEMPERATURE)
+
+
+def _backoff_delay(attempt: int, base: float, cap: float, error: Exception) -> float:
+    """
+    Compute how long to wait before retrying a failed request
+
+    Honors the server's retry-after header when present; otherwise uses
+    exponential backoff with full jitter so concurrent callers don't retry
+    in lockstep.
+
+    Args:
+        attempt: Zero-based attempt number
+        base: Base delay in seconds
+        cap: Maximum delay in seconds
+        error: The error that triggered the retry
+
+    Returns:
+        Delay in seconds
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(cap, float(retry_after))
+        except ValueError:
+            pass
+
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
 
-        Returns:
-            List of variant prompts
-        """
-        variant_prompt = f"""You are an expert in prompt engineering. Generate {num_variants} improved variants of the following system prompt.
 
-Optimization focus: {optimization_focus}
+class AnthropicClient:
+    """Enhanced Anthropic API client with retry logic"""
 
-Original prompt:
----
-{original_prompt}
----
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Initialize the Anthropic client
 
-Generate {num_variants} variants, each optimizing for {optimization_focus} while maintaining the core intent.
+        Args:
+            api_key: Anthropic API key. If None, uses config value
+        """
+        self.api_key = api_key or get_config().ANTHROPIC_API_KEY
+        if not self.api_key:
+            raise ValueError("Anthropic API key is required")
 
-Respond with each variant clearly separated:
+        self.client = _get_pooled_client(self.api_key)
+        self.max_retries = get_config().MAX_RETRIES
+        self.retry_delay = get_config().RETRY_DELAY
+        self.retry_max_delay = get_config().RETRY_MAX_DELAY
+        self.cache = response_cache
+        self.rate_limiter = rate_limiter
+        self._async_client: Optional["AsyncAnthropicClient"] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
 
-VARIANT 1:
----
-[First variant]
----
+        if get_config().WARM_ANALYSIS_CACHE:
+            self._warm_analysis_cache()
 
-VARIANT 2:
----
-[Second variant]
----
+    def _warm_analysis_cache(self):
+        """
+        Prime the prompt cache with the analysis rubrics, once per API key
 
-VARIANT 3:
----
-[Third variant]
----
-"""
+        Sends a 1-token request carrying the shared rubric block in a
+        background thread so the first real analysis reads from the cache.
+        Skipped when the block is shorter than the analysis model's minimum
+        cacheable prefix, since the paid request would cache nothing.
+        """
+        if not _shares_analysis_rubrics(get_config().ANALYSIS_MODEL):
+            logger.debug("Analysis rubrics are below the minimum cacheable prefix; skipping cache warmup")
+            return
 
-        response = self.create_message(prompt=variant_prompt)
+        with _POOL_LOCK:
+            if self.api_key in _WARMED_KEYS:
+                return
+            _WARMED_KEYS.add(self.api_key)
 
-        # Parse variants from response
-        variants = []
-        lines = response.split('\n')
-        current_variant = []
-        in_variant = False
-
-        for line in lines:
-            if line.startswith('VARIANT'):
-                if current_variant and in_variant:
-                    variants.append('\n'.join(current_variant).strip())
-                current_variant = []
-                in_variant = False
-            elif line.strip() == '---':
-                if in_variant:
-                    in_variant = False
-                else:
-                    in_variant = True
-            elif in_variant:
-                current_variant.append(line)
-
-        if current_variant and in_variant:
-            variants.append('\n'.join(current_variant).strip())
-
-        return variants[:num_variants]
+        def _warm():
+            try:
+                self.create_message_cached(
+                    system_blocks=_ANALYSIS_SYSTEM,
+                    user="Reply with OK.",
+                    model=get_config().ANALYSIS_MODEL,
+                    max_tokens=1
+                )
+            except Exception as e:
+                logger.warning("Analysis cache warmup failed: %s", e)
+
+        threading.Thread(target=_warm, name="promptforge-cache-warmup", daemon=True).start()
+
+    @property
+    def async_client(self) -> "AsyncAnthropicClient":
+        """
+        Async twin of this client, bound to the running event loop
 
-    def test_prompt(
-        self,
-        system_prompt: str,
-        test_input: str,
-        model: Optional[str] = None
-    ) -> str:
+        httpx async connections cannot outlive the loop that opened them, so a
+        new client is built whenever the caller is on a different loop (e.g.
+        each ``asyncio.run`` from a Streamlit rerun).
         """
-        Test a prompt with a specific input
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = AsyncAnthropicClient(api_key=self.api_key)
+            self._async_loop = loop
+        return self._async_client
+
+    def _retry_with_backoff(self, func, *args, **kwargs):
+        """
+        Execute function with jittered exponential backoff retry logic
 
         Args:
-            system_prompt: The system prompt to test
-            test_input: Test input to send
-            model: Model to use (optional)
+            func: Function to execute
+            *args, **kwargs: Arguments to pass to function
 
         Returns:
-            Model response
+            Function result
+
+        Raises:
+            APIError: If all retries fail
         """
-        return self.create_message(
-            prompt=test_input,
-            system_prompt=system_prompt,
-            model=model
-        )
+        sdk = _sdk()
+        last_error = None
 
-    def compare_responses(
+        for attempt in range(self.max_retries):
+            try:
+                return func(*args, **kwargs)
+            except sdk.RateLimitError as e:
+                last_error = e
+                if attempt < self.max_retries - 1:
+                    delay = _backoff_delay(attempt, self.retry_delay, self.retry_max_delay, e)
+                    time.sleep(delay)
+                    continue
+                raise
+            except sdk.APIError as e:
+                last_error = e
+                if attempt < self.max_retries - 1 and e.status_code >= 500:
+                    delay = _backoff_delay(attempt, self.retry_delay, self.retry_max_delay, e)
+                    time.sleep(delay)
+                    continue
+                raise
+
+        raise last_error
+
+    def create_message(
         self,
-        responses: List[Dict[str, str]],
-        evaluation_criteria: str
+        prompt: str,
+        system_prompt: Optional[SystemPrompt] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
     ) -> str:
         """
-        Use Claude as a judge to compare multiple responses
+        Create a message using Claude
 
         Args:
-            responses: List of dicts with 'name' and 'response' keys
-            evaluation_criteria: Criteria for evaluation
+            prompt: User prompt
+            system_prompt: System prompt (optional); a list of content blocks is passed through unchanged
+            model: Model to use (defaults to config)
+            max_tokens: Maximum tokens (defaults to config)
+            temperature: Temperature (defaults to config)
 
         Returns:
-            Comparison analysis
+            Response text from Claude
         """
-        comparison_prompt = f"""You are an expert evaluator. Compare the following responses based on these criteria:
+        model = model or get_config().DEFAULT_MODEL
+        max_tokens = max_tokens or get_config().MAX_TOKENS
+        temperature = temperature if temperature is not None else get_config().TEMPERATURE
 
-{evaluation_criteria}
+        def _create():
+            kwargs = {
+                "model": model,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "messages": [{"role": "user", "content": prompt}],
+            }
 
-"""
-        for i, resp in enumerate(responses, 1):
-            comparison_prompt += f"""
-RESPONSE {i} ({resp['name']}):
----
-{resp['response']}
----
+            if system_prompt:
+                kwargs["system"] = system_prompt
 
+            self.rate_limiter.acquire(estimate_tokens(system_prompt, prompt))
+            response = self.client.messages.create(**kwargs)
+            _log_cache_usage(response)
+            return response.content[0].text
+
+        cache_key = None
+        if is_cacheable(temperature):
+            cache_key = make_cache_key(model, system_prompt, prompt, temperature, max_tokens)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        text = self._retry_with_backoff(_create)
+
+        if cache_key is not None:
+            self.cache.set(cache_key, text)
+
+        return text
+
+    def stream_message(
+        self,
+        prompt: str,
+        system_prompt: Optional[SystemPrompt] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> Iterator[str]:
+        """
+        Stream a message from Claude as text chunks
+
+        Opening the stream is retried like ``create_message``; once text has
+        been yielded, errors propagate. Streamed responses bypass the
+        response cache.
+
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt (optional); a list of content blocks is passed through unchanged
+            model: Model to use (defaults to config)
+            max_tokens: Maximum tokens (defaults to config)
+            temperature: Temperature (defaults to config)
+
+        Yields:
+            Response text as it arrives
+        """
+        kwargs = {
+            "model": model or get_config().DEFAULT_MODEL,
+            "max_tokens": max_tokens or get_config().MAX_TOKENS,
+            "temperature": temperature if temperature is not None else get_config().TEMPERATURE,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if system_prompt:
+            kwargs["system"] = system_prompt
+
+        def _open():
+            self.rate_limiter.acquire(estimate_tokens(system_prompt, prompt))
+            # Entering the manager sends the request
+            return self.client.messages.stream(**kwargs).__enter__()
+
+        stream = self._retry_with_backoff(_open)
+        try:
+            yield from stream.text_stream
+            _log_cache_usage(stream.get_final_message())
+        finally:
+            stream.close()
+
+    def create_message_cached(
+        self,
+        system_blocks: List[Dict[str, Any]],
+        user: str,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """
+        Create a message whose system prompt is a list of (cacheable) blocks
+
+        Args:
+            system_blocks: System content blocks, typically carrying cache_control
+            user: User message
+            model: Model to use (defaults to config)
+            max_tokens: Maximum tokens (defaults to config)
+            temperature: Temperature (defaults to config)
+
+        Returns:
+            Response text from Claude
+        """
+        return self.create_message(
+            prompt=user,
+            system_prompt=system_blocks,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+
+    def analyze_prompt(
+        self,
+        prompt_to_analyze: str,
+        analysis_type: str = "general"
+    ) -> str:
+        """
+        Analyze a prompt using Claude with specialized meta-prompts
+
+        Args:
+            prompt_to_analyze: The prompt to analyze
+            analysis_type: Type of analysis ('clarity', 'completeness', 'efficiency', 'safety', 'general')
+
+        Returns:
+            Analysis result
+        """
+        use_semantic_cache = _use_semantic_cache()
+        namespace = f"{get_config().ANALYSIS_MODEL}:{analysis_type}"
+        if use_semantic_cache:
+            cached = semantic_cache.get(namespace, prompt_to_analyze)
+            if cached is not None:
+                return cached
+
+        system_blocks, user_message = _build_analysis_request(prompt_to_analyze, analysis_type)
+        analysis = self.create_message_cached(
+            system_blocks=system_blocks,
+            user=user_message,
+            model=get_config().ANALYSIS_MODEL
+        )
+
+        if use_semantic_cache:
+            semantic_cache.set(namespace, prompt_to_analyze, analysis)
+
+        return analysis
+
+    def stream_analysis(
+        self,
+        prompt_to_analyze: str,
+        analysis_type: str = "general"
+    ) -> Iterator[str]:
+        """
+        Streaming variant of ``analyze_prompt``
+
+        A semantic-cache hit is yielded as a single chunk; otherwise the
+        analysis is streamed and cached once complete.
+
+        Args:
+            prompt_to_analyze: The prompt to analyze
+            analysis_type: Type of analysis ('clarity', 'completeness', 'efficiency', 'safety', 'general')
+
+        Yields:
+            Analysis text as it arrives
+        """
+        use_semantic_cache = _use_semantic_cache()
+        namespace = f"{get_config().ANALYSIS_MODEL}:{analysis_type}"
+        if use_semantic_cache:
+            cached = semantic_cache.get(namespace, prompt_to_analyze)
+            if cached is not None:
+                yield cached
+                return
+
+        system_blocks, user_message = _build_analysis_request(prompt_to_analyze, analysis_type)
+        chunks = []
+        for chunk in self.stream_message(user_message, system_prompt=system_blocks, model=get_config().ANALYSIS_MODEL):
+            chunks.append(chunk)
+            yield chunk
+
+        if use_semantic_cache:
+            semantic_cache.set(namespace, prompt_to_analyze, "".join(chunks))
+
+    async def aanalyze_prompt(
+        self,
+        prompt_to_analyze: str,
+        analysis_type: str = "general"
+    ) -> str:
+        """
+        Async variant of ``analyze_prompt``
+
+        Args:
+            prompt_to_analyze: The prompt to analyze
+            analysis_type: Type of analysis ('clarity', 'completeness', 'efficiency', 'safety', 'general')
+
+        Returns:
+            Analysis result
+        """
+        return await self.async_client.analyze_prompt(prompt_to_analyze, analysis_type)
+
+    async def acreate_message(
+        self,
+        prompt: str,
+        system_prompt: Optional[SystemPrompt] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """Async variant of ``create_message``"""
+        return await self.async_client.create_message(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+
+    async def atest_prompt(
+        self,
+        system_prompt: str,
+        test_input: str,
+        model: Optional[str] = None
+    ) -> str:
+        """Async variant of ``test_prompt``"""
+        return await self.async_client.test_prompt(system_prompt, test_input, model)
+
+    def generate_variants(
+        self,
+        original_prompt: str,
+        optimization_focus: str = "balanced",
+        num_variants: int = 3
+    ) -> List[str]:
+        """
+        Generate optimized variants of a prompt
+
+        Args:
+            original_prompt: Original prompt to optimize
+            optimization_focus: What to optimize for ('clarity', 'conciseness', 'robustness', 'balanced')
+            num_variants: Number of variants to generate
+
+        Returns:
+            List of variant prompts
+        """
+        variant_prompt = f"""You are an expert in prompt engineering. Generate {num_variants} improved variants of the following system prompt.
+
+Optimization focus: {optimization_focus}
+
+Original prompt:
+---
+{original_prompt}
+---
+
+Generate {num_variants} variants, each optimizing for {optimization_focus} while maintaining the core intent.
+
+Respond with each variant clearly separated:
+
+VARIANT 1:
+---
+[First variant]
+---
+
+VARIANT 2:
+---
+[Second variant]
+---
+
+VARIANT 3:
+---
+[Third variant]
+---
 """
 
-        comparison_prompt += """
-Provide:
-1. Ranking from best to worst
-2. Specific strengths and weaknesses of each
-3. Overall recommendation
+        response = self.create_message(prompt=variant_prompt)
 
-Format:
-RANKING:
-1. [Name] - [Brief reason]
-2. [Name] - [Brief reason]
-...
+        # Parse variants from response
+        variants = [match.strip() for match in _VARIANT_RE.findall(response)]
+        # An empty body ("---" straight after "---") matches as the fence itself
+        return [variant for variant in variants if variant.strip("-").strip()][:num_variants]
 
-DETAILED ANALYSIS:
-[Response name]: [Strengths] | [Weaknesses]
-...
+    def test_prompt(
+        self,
+        system_prompt: str,
+        test_input: str,
+        model: Optional[str] = None
+    ) -> str:
+        """
+        Test a prompt with a specific input
+
+        Args:
+            system_prompt: The system prompt to test
+            test_input: Test input to send
+            model: Model to use (optional)
+
+        Returns:
+            Model response
+        """
+        # Every test case in a suite shares this system prompt
+        return self.create_message(
+            prompt=test_input,
+            system_prompt=cached_system(system_prompt) if system_prompt else None,
+            model=model
+        )
+
+    def compare_responses(
+        self,
+        responses: List[Dict[str, str]],
+        evaluation_criteria: str
+    ) -> str:
+        """
+        Use Claude as a judge to compare multiple responses
+
+        Args:
+            responses: List of dicts with 'name' and 'response' keys
+            evaluation_criteria: Criteria for evaluation
+
+        Returns:
+            Comparison analysis
+        """
+        system_blocks = cached_system(_COMPARISON_SYSTEM_TEMPLATE.substitute(criteria=evaluation_criteria))
+
+        comparison_prompt = "".join(
+            f"""
+RESPONSE {i} ({resp['name']}):
+---
+{resp['response']}
+---
 
-RECOMMENDATION:
-[Which response is best and why]
 """
+            for i, resp in enumerate(responses, 1)
+        )
+
+        return self.create_message_cached(system_blocks=system_blocks, user=comparison_prompt)
+
+    def batch_request(
+        self,
+        custom_id: str,
+        prompt: str,
+        system_prompt: Optional[SystemPrompt] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build one entry for ``submit_batch`` with the same defaults as ``create_message``
+
+        Args:
+            custom_id: Caller-chosen ID used to match the result (``[A-Za-z0-9_-]``, max 64 chars)
+            prompt: User prompt
+            system_prompt: System prompt (optional)
+            model: Model to use (defaults to config)
+            max_tokens: Maximum tokens (defaults to config)
+            temperature: Temperature (defaults to config)
+
+        Returns:
+            Batch request dictionary
+        """
+        params = {
+            "model": model or get_config().DEFAULT_MODEL,
+            "max_tokens": max_tokens or get_config().MAX_TOKENS,
+            "temperature": temperature if temperature is not None else get_config().TEMPERATURE,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if system_prompt:
+            params["system"] = system_prompt
+
+        return {"custom_id": custom_id, "params": params}
+
+    def test_batch_request(self, custom_id: str, system_prompt: str, test_input: str) -> Dict[str, Any]:
+        """
+        Build a ``submit_batch`` entry for the same request as ``test_prompt``
+
+        The system prompt goes in a cached block, as online, so a suite's
+        batched generations keep the prompt-cache discount.
+
+        Args:
+            custom_id: Caller-chosen ID used to match the result
+            system_prompt: The system prompt to test
+            test_input: Test input to send
+
+        Returns:
+            Batch request dictionary
+        """
+        return self.batch_request(
+            custom_id,
+            test_input,
+            system_prompt=cached_system(system_prompt) if system_prompt else None
+        )
+
+    def analysis_batch_request(self, custom_id: str, prompt_to_analyze: str, analysis_type: str = "general") -> Dict[str, Any]:
+        """
+        Build a ``submit_batch`` entry for the same request as ``analyze_prompt``
+
+        Args:
+            custom_id: Caller-chosen ID used to match the result
+            prompt_to_analyze: The prompt to analyze
+            analysis_type: Type of analysis ('clarity', 'completeness', 'efficiency', 'safety', 'general')
+
+        Returns:
+            Batch request dictionary
+        """
+        system_blocks, user_message = _build_analysis_request(prompt_to_analyze, analysis_type)
+        return self.batch_request(custom_id, user_message, system_prompt=system_blocks, model=get_config().ANALYSIS_MODEL)
+
+    def submit_batch(self, requests: List[Dict[str, Any]]) -> str:
+        """
+        Submit requests to the Message Batches API
+
+        Batches are processed asynchronously at a reduced per-token price,
+        which suits test suites where no single result is needed right away.
+
+        Args:
+            requests: Entries built with ``batch_request``
+
+        Returns:
+            Batch ID
+        """
+        batch = self._retry_with_backoff(self.client.messages.batches.create, requests=requests)
+        return batch.id
+
+    def wait_for_batch(self, batch_id: str, poll_interval: float = 10.0, timeout: Optional[float] = None):
+        """
+        Block until a batch has finished processing
 
-        return self.create_message(prompt=comparison_prompt)
+        Args:
+            batch_id: Batch ID returned by ``submit_batch``
+            poll_interval: Seconds between status checks
+            timeout: Give up after this many seconds (optional)
+
+        Raises:
+            TimeoutError: If the batch is still running after ``timeout``
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            batch = self._retry_with_backoff(self.client.messages.batches.retrieve, batch_id)
+            if batch.processing_status == "ended":
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Batch {batch_id} did not finish within {timeout}s")
+            time.sleep(poll_interval)
+
+    def get_batch_results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """
+        Read the results of a finished batch
+
+        Args:
+            batch_id: Batch ID returned by ``submit_batch``
+
+        Returns:
+            Response text by custom_id; None for requests that errored, expired or were canceled
+        """
+        results = {}
+        for entry in self._retry_with_backoff(self.client.messages.batches.results, batch_id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = entry.result.message.content[0].text
+            else:
+                logger.warning("Batch request %s %s", entry.custom_id, entry.result.type)
+                results[entry.custom_id] = None
+        return results
+
+    def run_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        poll_interval: float = 10.0,
+        timeout: Optional[float] = None,
+        batch_id: Optional[str] = None,
+        on_submit: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Submit a batch, wait for it and return its results
+
+        Args:
+            requests: Entries built with ``batch_request``
+            poll_interval: Seconds between status checks
+            timeout: Give up after this many seconds (optional)
+            batch_id: Resume waiting on a batch submitted earlier instead of submitting ``requests``
+            on_submit: Called with the new batch ID right after submission, so a
+                caller can fetch the results later if ``timeout`` is hit
+
+        Returns:
+            Response text by custom_id (see ``get_batch_results``)
+
+        Raises:
+            TimeoutError: If the batch is still running after ``timeout``
+        """
+        if batch_id is None:
+            if not requests:
+                return {}
+            batch_id = self.submit_batch(requests)
+            if on_submit:
+                on_submit(batch_id)
+
+        self.wait_for_batch(batch_id, poll_interval=poll_interval, timeout=timeout)
+        return self.get_batch_results(batch_id)
+
+
+class AsyncAnthropicClient:
+    """Async mirror of AnthropicClient for concurrent requests"""
+
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Initialize the async Anthropic client
+
+        Args:
+            api_key: Anthropic API key. If None, uses config value
+        """
+        self.api_key = api_key or get_config().ANTHROPIC_API_KEY
+        if not self.api_key:
+            raise ValueError("Anthropic API key is required")
+
+        self.client = _get_pooled_async_client(self.api_key)
+        self.max_retries = get_config().MAX_RETRIES
+        self.retry_delay = get_config().RETRY_DELAY
+        self.retry_max_delay = get_config().RETRY_MAX_DELAY
+        self.cache = response_cache
+        self.rate_limiter = rate_limiter
+
+    async def _retry_with_backoff(self, func, *args, **kwargs):
+        """
+        Await coroutine function with jittered exponential backoff retry logic
+
+        Args:
+            func: Coroutine function to execute
+            *args, **kwargs: Arguments to pass to function
+
+        Returns:
+            Function result
+
+        Raises:
+            APIError: If all retries fail
+        """
+        sdk = _sdk()
+        last_error = None
+
+        for attempt in range(self.max_retries):
+            try:
+                return await func(*args, **kwargs)
+            except sdk.RateLimitError as e:
+                last_error = e
+                if attempt < self.max_retries - 1:
+                    delay = _backoff_delay(attempt, self.retry_delay, self.retry_max_delay, e)
+                    await asyncio.sleep(delay)
+                    continue
+                raise
+            except sdk.APIError as e:
+                last_error = e
+                if attempt < self.max_retries - 1 and e.status_code >= 500:
+                    delay = _backoff_delay(attempt, self.retry_delay, self.retry_max_delay, e)
+                    await asyncio.sleep(delay)
+                    continue
+                raise
+
+        raise last_error
+
+    async def create_message(
+        self,
+        prompt: str,
+        system_prompt: Optional[SystemPrompt] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """
+        Create a message using Claude
+
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt (optional); a list of content blocks is passed through unchanged
+            model: Model to use (defaults to config)
+            max_tokens: Maximum tokens (defaults to config)
+            temperature: Temperature (defaults to config)
+
+        Returns:
+            Response text from Claude
+        """
+        model = model or get_config().DEFAULT_MODEL
+        max_tokens = max_tokens or get_config().MAX_TOKENS
+        temperature = temperature if temperature is not None else get_config().TEMPERATURE
+
+        async def _create():
+            kwargs = {
+                "model": model,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "messages": [{"role": "user", "content": prompt}],
+            }
+
+            if system_prompt:
+                kwargs["system"] = system_prompt
+
+            async with _get_semaphore():
+                await self.rate_limiter.aacquire(estimate_tokens(system_prompt, prompt))
+                response = await self.client.messages.create(**kwargs)
+            _log_cache_usage(response)
+            return response.content[0].text
+
+        cache_key = None
+        if is_cacheable(temperature):
+            cache_key = make_cache_key(model, system_prompt, prompt, temperature, max_tokens)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        text = await self._retry_with_backoff(_create)
+
+        if cache_key is not None:
+            self.cache.set(cache_key, text)
+
+        return text
+
+    async def create_message_cached(
+        self,
+        system_blocks: List[Dict[str, Any]],
+        user: str,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """
+        Create a message whose system prompt is a list of (cacheable) blocks
+
+        Args:
+            system_blocks: System content blocks, typically carrying cache_control
+            user: User message
+            model: Model to use (defaults to config)
+            max_tokens: Maximum tokens (defaults to config)
+            temperature: Temperature (defaults to config)
+
+        Returns:
+            Response text from Claude
+        """
+        return await self.create_message(
+            prompt=user,
+            system_prompt=system_blocks,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+
+    async def analyze_prompt(
+        self,
+        prompt_to_analyze: str,
+        analysis_type: str = "general"
+    ) -> str:
+        """
+        Analyze a prompt using Claude with specialized meta-prompts
+
+        Args:
+            prompt_to_analyze: The prompt to analyze
+            analysis_type: Type of analysis ('clarity', 'completeness', 'efficiency', 'safety', 'general')
+
+        Returns:
+            Analysis result
+        """
+        # Embedding is CPU-bound, so it runs in a worker thread
+        use_semantic_cache = _use_semantic_cache()
+        namespace = f"{get_config().ANALYSIS_MODEL}:{analysis_type}"
+        if use_semantic_cache:
+            cached = await asyncio.to_thread(semantic_cache.get, namespace, prompt_to_analyze)
+            if cached is not None:
+                return cached
+
+        system_blocks, user_message = _build_analysis_request(prompt_to_analyze, analysis_type)
+        analysis = await self.create_message_cached(
+            system_blocks=system_blocks,
+            user=user_message,
+            model=get_config().ANALYSIS_MODEL
+        )
+
+        if use_semantic_cache:
+            await asyncio.to_thread(semantic_cache.set, namespace, prompt_to_analyze, analysis)
+
+        return analysis
+
+    async def test_prompt(
+        self,
+        system_prompt: str,
+        test_input: str,
+        model: Optional[str] = None
+    ) -> str:
+        """
+        Test a prompt with a specific input
+
+        Args:
+            system_prompt: The system prompt to test
+            test_input: Test input to send
+            model: Model to use (optional)
+
+        Returns:
+            Model response
+        """
+        return await self.create_message(
+            prompt=test_input,
+            system_prompt=cached_system(system_prompt) if system_prompt else None,
+            model=model
+        )
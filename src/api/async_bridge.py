@@ -0,0 +1,38 @@
+"""
+Bridge for running coroutines from synchronous (Streamlit) code
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) and return the background event loop"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="promptforge-aio", daemon=True)
+            thread.start()
+        return _loop
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine on the shared background loop and wait for its result
+
+    Unlike ``asyncio.run``, every caller shares one long-lived loop, so pooled
+    async HTTP connections and the concurrency semaphore are reused across
+    Streamlit reruns and sessions. Must not be called from the background
+    loop itself.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
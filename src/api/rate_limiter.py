@@ -0,0 +1,94 @@
+"""
+Client-side rate limiting for Anthropic API calls
+"""
+import asyncio
+import threading
+import time
+
+from src.config import get_config
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize the bucket
+
+        Args:
+            per_minute: Refill rate and capacity. Zero or less disables limiting
+        """
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.refill_per_second = self.capacity / 60.0
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """
+        Take amount tokens, going into debt if necessary
+
+        Args:
+            amount: Tokens to take
+
+        Returns:
+            Seconds the caller must wait before proceeding
+        """
+        if not self.enabled:
+            return 0.0
+
+        amount = min(amount, self.capacity)
+
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.updated_at
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self.updated_at = now
+
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_per_second
+
+
+class RateLimiter:
+    """Request-per-minute and token-per-minute throttle shared by all clients"""
+
+    def __init__(self, rpm: int, tpm: int):
+        """
+        Initialize the limiter
+
+        Args:
+            rpm: Requests per minute (0 disables)
+            tpm: Input tokens per minute (0 disables)
+        """
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def _reserve(self, tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def acquire(self, tokens: int = 0):
+        """Block until a request of the given size may be sent"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int = 0):
+        """Async variant of ``acquire``"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def estimate_tokens(*texts) -> int:
+    """Rough input-token estimate (~4 characters per token)"""
+    return sum(len(str(t)) for t in texts if t) // 4
+
+
+# Process-wide limiter sized to the account's tier
+rate_limiter = RateLimiter(rpm=get_config().ANTHROPIC_RPM, tpm=get_config().ANTHROPIC_TPM)
@@ -0,0 +1,123 @@
+"""
+In-memory response cache for Claude requests
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+import orjson
+
+from src.config import get_config
+
+# Sampling above this temperature is meant to vary between calls, so those
+# responses are never served from cache.
+MAX_CACHEABLE_TEMPERATURE = 0.3
+
+
+def make_cache_key(
+    model: str,
+    system_prompt: Any,
+    prompt: str,
+    temperature: float,
+    max_tokens: int
+) -> str:
+    """
+    Build a stable cache key for a request
+
+    Args:
+        model: Model name
+        system_prompt: System prompt (string or list of content blocks)
+        prompt: User prompt
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = orjson.dumps({
+        "model": model,
+        "system_prompt": system_prompt,
+        "prompt": prompt,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def is_cacheable(temperature: float) -> bool:
+    """Whether a request at this temperature may be served from cache"""
+    return temperature <= MAX_CACHEABLE_TEMPERATURE
+
+
+class InMemoryResponseCache:
+    """Thread-safe LRU cache with per-entry TTL"""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 3600.0):
+        """
+        Initialize the cache
+
+        Args:
+            maxsize: Maximum number of entries before LRU eviction
+            ttl: Seconds an entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        """Store a response, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else None
+            }
+
+
+# Process-wide cache shared by every client instance
+response_cache = InMemoryResponseCache(
+    maxsize=get_config().RESPONSE_CACHE_SIZE,
+    ttl=get_config().RESPONSE_CACHE_TTL
+)
@@ -0,0 +1,101 @@
+"""
+Semantic (embedding-similarity) cache for prompt analyses
+"""
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from src.config import get_config
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class SemanticCache:
+    """
+    LRU cache that matches near-duplicate texts by cosine similarity
+
+    Entries are partitioned by an exact namespace (e.g. model + analysis
+    type) and matched within it on the embedding of the text. Embeddings come
+    from a local sentence-transformers model, loaded on first use so the
+    dependency is only needed when the cache is enabled.
+    """
+
+    def __init__(self, model_name: str, threshold: float = 0.95, maxsize: int = 256):
+        """
+        Initialize the cache
+
+        Args:
+            model_name: sentence-transformers model used for embeddings
+            threshold: Minimum cosine similarity for a hit
+            maxsize: Maximum number of entries before LRU eviction
+        """
+        self.model_name = model_name
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._model = None
+        self._entries: "OrderedDict[int, Tuple[str, np.ndarray, str]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> "np.ndarray":
+        """Embed text as a unit-length float32 vector"""
+        import numpy as np
+
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+        vector = self._model.encode(text, normalize_embeddings=True)
+        return np.asarray(vector, dtype=np.float32)
+
+    def get(self, namespace: str, text: str) -> Optional[str]:
+        """
+        Return the cached response for the most similar text, if close enough
+
+        Args:
+            namespace: Exact-match partition (e.g. model and analysis type)
+            text: Text to match semantically
+
+        Returns:
+            Cached response or None
+        """
+        import numpy as np
+
+        query = self.encode(text)
+
+        with self._lock:
+            candidates = [(key, vector) for key, (ns, vector, _) in self._entries.items() if ns == namespace]
+            if not candidates:
+                return None
+
+            keys = [key for key, _ in candidates]
+            similarities = np.stack([vector for _, vector in candidates]) @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            self._entries.move_to_end(keys[best])
+            return self._entries[keys[best]][2]
+
+    def set(self, namespace: str, text: str, response: str):
+        """Store a response, evicting the least recently used entry if full"""
+        vector = self.encode(text)
+
+        with self._lock:
+            self._entries[self._next_id] = (namespace, vector, response)
+            self._next_id += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide cache shared by every client instance
+semantic_cache = SemanticCache(
+    model_name=get_config().SEMANTIC_CACHE_MODEL,
+    threshold=get_config().SEMANTIC_CACHE_THRESHOLD,
+    maxsize=get_config().SEMANTIC_CACHE_SIZE
+)
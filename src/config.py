@@ -2,46 +2,129 @@
 Configuration management for Prompt Forge Studio
 """
 import os
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Optional
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
 
+@dataclass(frozen=True, slots=True)
 class Config:
-    """Application configuration"""
+    """
+    Application configuration
+
+    Immutable snapshot built once by ``_load_config``. Runtime changes (only
+    the API key today) go through ``set_api_key``, which publishes a new
+    snapshot; always read it through ``get_config()``.
+    """
 
     # API Configuration
-    ANTHROPIC_API_KEY: Optional[str] = os.getenv("ANTHROPIC_API_KEY")
-    DEFAULT_MODEL: str = os.getenv("DEFAULT_MODEL", "claude-sonnet-4-5-20250929")
-    ANALYSIS_MODEL: str = os.getenv("ANALYSIS_MODEL", "claude-sonnet-4-5-20250929")
+    ANTHROPIC_API_KEY: Optional[str]
+    DEFAULT_MODEL: str
+    ANALYSIS_MODEL: str
 
     # API Limits
-    MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", "4096"))
-    TEMPERATURE: float = float(os.getenv("TEMPERATURE", "1.0"))
-    MAX_RETRIES: int = 3
-    RETRY_DELAY: float = 2.0  # seconds
+    MAX_TOKENS: int
+    TEMPERATURE: float
+    MAX_RETRIES: int
+    RETRY_DELAY: float  # seconds
+    RETRY_MAX_DELAY: float  # seconds
+    ANTHROPIC_RPM: int
+    ANTHROPIC_TPM: int
+    MAX_CONCURRENCY: int
+
+    # Response Cache
+    RESPONSE_CACHE_SIZE: int
+    RESPONSE_CACHE_TTL: float  # seconds
+    WARM_ANALYSIS_CACHE: bool
+
+    # Semantic Cache (requires sentence-transformers)
+    ENABLE_SEMANTIC_CACHE: bool
+    SEMANTIC_CACHE_MODEL: str
+    SEMANTIC_CACHE_THRESHOLD: float
+    SEMANTIC_CACHE_SIZE: int
+
+    # Persistent test-output cache (temperature 0 only)
+    TEST_CACHE_THRESHOLD: float
 
     # Database
-    DATABASE_PATH: str = os.getenv("DATABASE_PATH", "./promptforge.db")
+    DATABASE_PATH: str
+    DATABASE_URL: Optional[str]  # overrides DATABASE_PATH, e.g. a Postgres/pgbouncer URL
+    DB_POOL_SIZE: int
+    DB_MAX_OVERFLOW: int
 
     # App Settings
-    DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
-    APP_NAME: str = "Prompt Forge Studio"
-    APP_VERSION: str = "0.1.0"
+    DEBUG: bool
+    APP_NAME: str
+    APP_VERSION: str
 
-    @classmethod
-    def validate(cls) -> bool:
+    def validate(self) -> bool:
         """Validate critical configuration"""
-        if not cls.ANTHROPIC_API_KEY:
+        if not self.ANTHROPIC_API_KEY:
             return False
         return True
 
-    @classmethod
-    def set_api_key(cls, api_key: str):
-        """Set API key at runtime"""
-        cls.ANTHROPIC_API_KEY = api_key
-        os.environ["ANTHROPIC_API_KEY"] = api_key
+    def set_api_key(self, api_key: str):
+        """Set API key at runtime (see module-level ``set_api_key``)"""
+        set_api_key(api_key)
+
+
+def _load_config() -> Config:
+    """Build the configuration snapshot from environment variables (and .env)"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return Config(
+        ANTHROPIC_API_KEY=os.getenv("ANTHROPIC_API_KEY"),
+        DEFAULT_MODEL=os.getenv("DEFAULT_MODEL", "claude-sonnet-4-5-20250929"),
+        ANALYSIS_MODEL=os.getenv("ANALYSIS_MODEL", "claude-sonnet-4-5-20250929"),
+        MAX_TOKENS=int(os.getenv("MAX_TOKENS", "4096")),
+        TEMPERATURE=float(os.getenv("TEMPERATURE", "1.0")),
+        MAX_RETRIES=8,
+        RETRY_DELAY=2.0,
+        RETRY_MAX_DELAY=60.0,
+        ANTHROPIC_RPM=int(os.getenv("ANTHROPIC_RPM", "50")),
+        ANTHROPIC_TPM=int(os.getenv("ANTHROPIC_TPM", "30000")),
+        MAX_CONCURRENCY=int(os.getenv("MAX_CONCURRENCY", "20")),
+        RESPONSE_CACHE_SIZE=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+        RESPONSE_CACHE_TTL=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        WARM_ANALYSIS_CACHE=os.getenv("WARM_ANALYSIS_CACHE", "false").lower() == "true",
+        ENABLE_SEMANTIC_CACHE=os.getenv("ENABLE_SEMANTIC_CACHE", "false").lower() == "true",
+        SEMANTIC_CACHE_MODEL=os.getenv("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2"),
+        SEMANTIC_CACHE_THRESHOLD=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+        SEMANTIC_CACHE_SIZE=int(os.getenv("SEMANTIC_CACHE_SIZE", "256")),
+        TEST_CACHE_THRESHOLD=float(os.getenv("TEST_CACHE_THRESHOLD", "0.92")),
+        DATABASE_PATH=os.getenv("DATABASE_PATH", "./promptforge.db"),
+        DATABASE_URL=os.getenv("DATABASE_URL"),
+        DB_POOL_SIZE=int(os.getenv("DB_POOL_SIZE", "8")),
+        DB_MAX_OVERFLOW=int(os.getenv("DB_MAX_OVERFLOW", "16")),
+        DEBUG=os.getenv("DEBUG", "false").lower() == "true",
+        APP_NAME="Prompt Forge Studio",
+        APP_VERSION="0.1.0",
+    )
+
+
+# Built by the first get_config() call, so importing this module doesn't
+# read .env. Read it through get_config(): set_api_key replaces the snapshot.
+_config: Optional[Config] = None
+
+
+def get_config() -> Config:
+    """Return the current configuration snapshot, loading it on first use"""
+    global _config
+    if _config is None:
+        _config = _load_config()
+    return _config
+
+
+def set_api_key(api_key: str):
+    """Set API key at runtime, publishing a new configuration snapshot"""
+    global _config
+    os.environ["ANTHROPIC_API_KEY"] = api_key
+    _config = replace(get_config(), ANTHROPIC_API_KEY=api_key)
+
 
-config = Config()
+def __getattr__(name: str):
+    """Keep ``src.config.config`` working as a lazy alias of ``get_config()``"""
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,26 @@
 """
 Multi-dimensional prompt quality analyzer
 """
+import asyncio
 import re
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Any, Pattern
 from src.api.anthropic_client import AnthropicClient
+from src.api.async_bridge import run_sync
+from src.config import get_config
+from src.core.llm_cache import LLMCache, content_hash
 from src.db.database import Database
 
+# Score patterns are compiled once at import, keyed by analysis type
+_SCORE_PATTERNS: Dict[str, Pattern] = {
+    "clarity": re.compile(r"CLARITY SCORE:\s*(\d+)"),
+    "completeness": re.compile(r"COMPLETENESS SCORE:\s*(\d+)"),
+    "efficiency": re.compile(r"EFFICIENCY SCORE:\s*(\d+)"),
+    "safety": re.compile(r"SAFETY SCORE:\s*(\d+)"),
+    "general": re.compile(r"OVERALL SCORE:\s*(\d+)"),
+}
+_GENERIC_SCORE_PATTERN = re.compile(r"SCORE:\s*(\d+)")
+
 
 class PromptAnalyzer:
     """Analyzer for prompt quality across multiple dimensions"""
@@ -21,18 +36,18 @@ class PromptAnalyzer:
         self.client = client
         self.db = db
 
-    def _extract_score(self, analysis_text: str, score_pattern: str = r"SCORE:\s*(\d+)") -> Optional[int]:
+    def _extract_score(self, analysis_text: str, score_pattern: Pattern = _GENERIC_SCORE_PATTERN) -> Optional[int]:
         """
         Extract numeric score from analysis text
 
         Args:
             analysis_text: Text containing score
-            score_pattern: Regex pattern to extract score
+            score_pattern: Compiled regex pattern to extract score
 
         Returns:
             Extracted score or None
         """
-        match = re.search(score_pattern, analysis_text)
+        match = score_pattern.search(analysis_text)
         if match:
             try:
                 return int(match.group(1))
@@ -40,39 +55,68 @@ class PromptAnalyzer:
                 pass
         return None
 
-    def analyze_clarity(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+    def _analysis_key(self, prompt: str, analysis_type: str) -> Optional[str]:
         """
-        Analyze prompt for clarity and ambiguity
+        Content hash under which an analysis of this prompt is stored
+
+        Only deterministic (temperature 0) analyses are keyed, following the
+        same rule as the tester; sampled analyses always call the API.
+
+        Returns:
+            Hex digest, or None when the analysis is not deterministic
+        """
+        if not LLMCache.is_cacheable(get_config().TEMPERATURE):
+            return None
+        return content_hash({"model": get_config().ANALYSIS_MODEL, "type": analysis_type, "prompt": prompt})
+
+    def _find_stored(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Stored analysis for a content hash, if the analysis is reusable"""
+        return self.db.find_analysis(key) if key is not None else None
+
+    def _analyze(
+        self,
+        prompt: str,
+        analysis_type: str,
+        version_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a single analysis dimension
+
+        For deterministic analyses (see ``_analysis_key``), one already stored
+        for identical content (same model, type and prompt text) is reused
+        instead of calling the API.
 
         Args:
             prompt: Prompt to analyze
+            analysis_type: Type of analysis to request
             version_id: Version ID to save analysis to (optional)
 
         Returns:
             Analysis result dictionary
         """
-        analysis = self.client.analyze_prompt(prompt, analysis_type="clarity")
-        score = self._extract_score(analysis, r"CLARITY SCORE:\s*(\d+)")
+        key = self._analysis_key(prompt, analysis_type)
+        stored = self._find_stored(key)
+        if stored is not None:
+            analysis, score = stored["content"], stored["score"]
+        else:
+            analysis = self.client.analyze_prompt(prompt, analysis_type=analysis_type)
+            score = self._extract_score(analysis, _SCORE_PATTERNS[analysis_type])
 
         result = {
-            "type": "clarity",
+            "type": analysis_type,
             "score": score,
-            "content": analysis
+            "content": analysis,
+            "content_hash": key
         }
 
         if version_id:
-            self.db.save_analysis(
-                version_id=version_id,
-                analysis_type="clarity",
-                content=analysis,
-                score=score
-            )
+            self._save_results(version_id, [result])
 
         return result
 
-    def analyze_completeness(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+    def analyze_clarity(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
         """
-        Analyze prompt for completeness and robustness
+        Analyze prompt for clarity and ambiguity
 
         Args:
             prompt: Prompt to analyze
@@ -81,24 +125,20 @@ class PromptAnalyzer:
         Returns:
             Analysis result dictionary
         """
-        analysis = self.client.analyze_prompt(prompt, analysis_type="completeness")
-        score = self._extract_score(analysis, r"COMPLETENESS SCORE:\s*(\d+)")
+        return self._analyze(prompt, "clarity", version_id)
 
-        result = {
-            "type": "completeness",
-            "score": score,
-            "content": analysis
-        }
+    def analyze_completeness(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Analyze prompt for completeness and robustness
 
-        if version_id:
-            self.db.save_analysis(
-                version_id=version_id,
-                analysis_type="completeness",
-                content=analysis,
-                score=score
-            )
+        Args:
+            prompt: Prompt to analyze
+            version_id: Version ID to save analysis to (optional)
 
-        return result
+        Returns:
+            Analysis result dictionary
+        """
+        return self._analyze(prompt, "completeness", version_id)
 
     def analyze_efficiency(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -111,24 +151,7 @@ class PromptAnalyzer:
         Returns:
             Analysis result dictionary
         """
-        analysis = self.client.analyze_prompt(prompt, analysis_type="efficiency")
-        score = self._extract_score(analysis, r"EFFICIENCY SCORE:\s*(\d+)")
-
-        result = {
-            "type": "efficiency",
-            "score": score,
-            "content": analysis
-        }
-
-        if version_id:
-            self.db.save_analysis(
-                version_id=version_id,
-                analysis_type="efficiency",
-                content=analysis,
-                score=score
-            )
-
-        return result
+        return self._analyze(prompt, "efficiency", version_id)
 
     def analyze_safety(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -141,77 +164,343 @@ class PromptAnalyzer:
         Returns:
             Analysis result dictionary
         """
-        analysis = self.client.analyze_prompt(prompt, analysis_type="safety")
-        score = self._extract_score(analysis, r"SAFETY SCORE:\s*(\d+)")
+        return self._analyze(prompt, "safety", version_id)
+
+    def analyze_comprehensive(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Perform comprehensive analysis across all dimensions
+
+        Args:
+            prompt: Prompt to analyze
+            version_id: Version ID to save analysis to (optional)
+
+        Returns:
+            Analysis result dictionary with overall score and recommendations
+        """
+        return self._analyze(prompt, "general", version_id)
+
+    def stream_analysis(
+        self,
+        analysis_type: str,
+        prompt: str,
+        version_id: Optional[int] = None,
+        on_complete: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Iterator[str]:
+        """
+        Stream a single analysis dimension, saving it once complete
+
+        A reusable stored analysis (see ``_analyze``) is yielded as a single chunk.
+
+        Args:
+            analysis_type: Type of analysis ('clarity', 'completeness', 'efficiency', 'safety', 'general')
+            prompt: Prompt to analyze
+            version_id: Version ID to save analysis to (optional)
+            on_complete: Called with the result dictionary after the stream is exhausted (optional)
+
+        Yields:
+            Analysis text as it arrives
+        """
+        key = self._analysis_key(prompt, analysis_type)
+        stored = self._find_stored(key)
+        if stored is not None:
+            analysis, score = stored["content"], stored["score"]
+            yield analysis
+        else:
+            chunks = []
+            for chunk in self.client.stream_analysis(prompt, analysis_type=analysis_type):
+                chunks.append(chunk)
+                yield chunk
+
+            analysis = "".join(chunks)
+            score = self._extract_score(analysis, _SCORE_PATTERNS[analysis_type])
 
         result = {
-            "type": "safety",
+            "type": analysis_type,
             "score": score,
-            "content": analysis
+            "content": analysis,
+            "content_hash": key
         }
 
         if version_id:
-            self.db.save_analysis(
-                version_id=version_id,
-                analysis_type="safety",
-                content=analysis,
-                score=score
+            self._save_results(version_id, [result])
+
+        if on_complete:
+            on_complete(result)
+
+    def analyze_all_dimensions(
+        self,
+        prompt: str,
+        version_id: Optional[int] = None,
+        include_general: bool = True,
+        mode: str = "online",
+        batch_timeout: Optional[float] = None,
+        batch_ids: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze prompt across all dimensions
+
+        In "online" mode this is a sync wrapper around ``aanalyze_all_dimensions``
+        for Streamlit callers; the coroutine runs on the shared background loop
+        (see ``run_sync``). When called from a thread that already runs an
+        event loop (where blocking on it would stall that loop), the sync
+        analyses are fanned out over a thread pool instead; the SDK releases
+        the GIL on network I/O. "batch" mode goes through the Message Batches
+        API (see ``_analyze_all_dimensions_batch``).
+
+        Args:
+            prompt: Prompt to analyze
+            version_id: Version ID to save analyses to (optional)
+            include_general: See ``aanalyze_all_dimensions``
+            mode: 'online' or 'batch'
+            batch_timeout: See ``_analyze_all_dimensions_batch``
+            batch_ids: See ``_analyze_all_dimensions_batch``
+
+        Returns:
+            List of analysis results
+        """
+        if mode == "batch":
+            return self._analyze_all_dimensions_batch(
+                prompt, version_id, include_general, timeout=batch_timeout, batch_ids=batch_ids
             )
+        if mode != "online":
+            raise ValueError(f"Unknown analysis mode: {mode}")
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return run_sync(self.aanalyze_all_dimensions(prompt, version_id, include_general))
+
+        analyses = [
+            self.analyze_clarity,
+            self.analyze_completeness,
+            self.analyze_efficiency,
+            self.analyze_safety,
+        ]
+        with ThreadPoolExecutor(max_workers=len(analyses)) as executor:
+            futures = [executor.submit(analyze, prompt) for analyze in analyses]
+            results = [future.result() for future in futures]
 
-        return result
+        if version_id:
+            self._save_results(version_id, results)
 
-    def analyze_comprehensive(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+        if include_general:
+            results.append(self._synthesize_general(results))
+
+        return results
+
+    def _analyze_all_dimensions_batch(
+        self,
+        prompt: str,
+        version_id: Optional[int] = None,
+        include_general: bool = True,
+        timeout: Optional[float] = None,
+        batch_ids: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Perform comprehensive analysis across all dimensions
+        Analyze prompt across all dimensions through the Message Batches API
+
+        Dimensions without a reusable stored analysis go out as one batch, matched
+        back by custom_id; requests that fail inside the batch are retried
+        online. Batches cost about half as much as online calls but can
+        take minutes to complete.
+
+        Args:
+            prompt: Prompt to analyze
+            version_id: Version ID to save analyses to (optional)
+            include_general: See ``aanalyze_all_dimensions``
+            timeout: Seconds to wait for the batch before raising TimeoutError (optional)
+            batch_ids: Batch ID by stage ("analysis"); the submitted ID is recorded
+                here, and a recorded one is resumed instead of submitting again
+
+        Returns:
+            List of analysis results
+
+        Raises:
+            TimeoutError: If the batch is still running after ``timeout``
+        """
+        analysis_types = ["clarity", "completeness", "efficiency", "safety"]
+        batch_ids = {} if batch_ids is None else batch_ids
+
+        keys = {t: self._analysis_key(prompt, t) for t in analysis_types}
+        stored = {t: self._find_stored(keys[t]) for t in analysis_types}
+        requests = [
+            self.client.analysis_batch_request(t, prompt, analysis_type=t)
+            for t in analysis_types if stored[t] is None
+        ]
+        responses = self.client.run_batch(
+            requests,
+            timeout=timeout,
+            batch_id=batch_ids.get("analysis"),
+            on_submit=lambda batch_id: batch_ids.update(analysis=batch_id)
+        )
+
+        results = []
+        for t in analysis_types:
+            if stored[t] is not None:
+                analysis, score = stored[t]["content"], stored[t]["score"]
+            else:
+                analysis = responses.get(t)
+                if analysis is None:
+                    analysis = self.client.analyze_prompt(prompt, analysis_type=t)
+                score = self._extract_score(analysis, _SCORE_PATTERNS[t])
+
+            results.append({
+                "type": t,
+                "score": score,
+                "content": analysis,
+                "content_hash": keys[t]
+            })
+
+        if version_id:
+            self._save_results(version_id, results)
+
+        if include_general:
+            results.append(self._synthesize_general(results))
+
+        return results
+
+    def _synthesize_general(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the overall ("general") result locally from dimension results
+
+        Args:
+            results: Clarity, completeness, efficiency and safety results
+
+        Returns:
+            Analysis result dictionary whose score is the mean dimension score
+        """
+        scores = [r["score"] for r in results if r["score"] is not None]
+        score = round(sum(scores) / len(scores)) if scores else None
+
+        lines = [f"OVERALL SCORE: {score if score is not None else 'N/A'}", ""]
+        lines.append("Derived from the individual dimension scores (no separate API call):")
+        lines.append("")
+        for r in results:
+            lines.append(f"- {r['type'].title()}: {r['score'] if r['score'] is not None else 'N/A'}/100")
+
+        return {
+            "type": "general",
+            "score": score,
+            "content": "\n".join(lines)
+        }
+
+    async def _aanalyze(
+        self,
+        prompt: str,
+        analysis_type: str,
+        version_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a single analysis dimension asynchronously (see ``_analyze``)
 
         Args:
             prompt: Prompt to analyze
+            analysis_type: Type of analysis to request
             version_id: Version ID to save analysis to (optional)
 
         Returns:
-            Analysis result dictionary with overall score and recommendations
+            Analysis result dictionary
         """
-        analysis = self.client.analyze_prompt(prompt, analysis_type="general")
-        score = self._extract_score(analysis, r"OVERALL SCORE:\s*(\d+)")
+        key = self._analysis_key(prompt, analysis_type)
+        # Keep the blocking SQLite calls off the event loop
+        stored = await asyncio.to_thread(self._find_stored, key)
+        if stored is not None:
+            analysis, score = stored["content"], stored["score"]
+        else:
+            analysis = await self.client.aanalyze_prompt(prompt, analysis_type=analysis_type)
+            score = self._extract_score(analysis, _SCORE_PATTERNS[analysis_type])
 
         result = {
-            "type": "general",
+            "type": analysis_type,
             "score": score,
-            "content": analysis
+            "content": analysis,
+            "content_hash": key
         }
 
         if version_id:
-            self.db.save_analysis(
-                version_id=version_id,
-                analysis_type="general",
-                content=analysis,
-                score=score
-            )
+            await asyncio.to_thread(self._save_results, version_id, [result])
 
         return result
 
-    def analyze_all_dimensions(self, prompt: str, version_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    async def aanalyze_clarity(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+        """Async variant of ``analyze_clarity``"""
+        return await self._aanalyze(prompt, "clarity", version_id)
+
+    async def aanalyze_completeness(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+        """Async variant of ``analyze_completeness``"""
+        return await self._aanalyze(prompt, "completeness", version_id)
+
+    async def aanalyze_efficiency(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+        """Async variant of ``analyze_efficiency``"""
+        return await self._aanalyze(prompt, "efficiency", version_id)
+
+    async def aanalyze_safety(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+        """Async variant of ``analyze_safety``"""
+        return await self._aanalyze(prompt, "safety", version_id)
+
+    async def aanalyze_comprehensive(self, prompt: str, version_id: Optional[int] = None) -> Dict[str, Any]:
+        """Async variant of ``analyze_comprehensive``"""
+        return await self._aanalyze(prompt, "general", version_id)
+
+    async def aanalyze_all_dimensions(
+        self,
+        prompt: str,
+        version_id: Optional[int] = None,
+        include_general: bool = True
+    ) -> List[Dict[str, Any]]:
         """
-        Analyze prompt across all dimensions
+        Analyze prompt across all dimensions concurrently
+
+        The four dimension analyses run concurrently, and by default an
+        overall ("general") entry is appended, derived locally from their
+        scores rather than from a comprehensive call that would re-evaluate
+        the same four dimensions. The derived entry is returned only; it is
+        never saved.
+
+        Results are saved after the gather so the SQLite writes don't
+        interleave with the API calls.
 
         Args:
             prompt: Prompt to analyze
             version_id: Version ID to save analyses to (optional)
+            include_general: Append the locally derived overall result (set False to omit it)
 
         Returns:
             List of analysis results
         """
-        results = []
+        results = list(await asyncio.gather(
+            self.aanalyze_clarity(prompt),
+            self.aanalyze_completeness(prompt),
+            self.aanalyze_efficiency(prompt),
+            self.aanalyze_safety(prompt),
+        ))
+
+        if version_id:
+            await asyncio.to_thread(self._save_results, version_id, results)
 
-        # Run all analyses
-        results.append(self.analyze_clarity(prompt, version_id))
-        results.append(self.analyze_completeness(prompt, version_id))
-        results.append(self.analyze_efficiency(prompt, version_id))
-        results.append(self.analyze_safety(prompt, version_id))
-        results.append(self.analyze_comprehensive(prompt, version_id))
+        if include_general:
+            results.append(self._synthesize_general(results))
 
         return results
 
+    def _save_results(self, version_id: int, results: List[Dict[str, Any]]):
+        """
+        Persist a list of analysis results for a version in one transaction
+
+        Reused analyses already saved for this version are skipped, so
+        re-running an unchanged prompt doesn't pile up duplicate rows.
+        """
+        hashes = [result["content_hash"] for result in results if result.get("content_hash")]
+        saved = self.db.find_analysis_hashes(version_id, hashes)
+
+        self.db.save_analyses_batch([{
+            "version_id": version_id,
+            "analysis_type": result["type"],
+            "content": result["content"],
+            "score": result["score"],
+            "content_hash": result.get("content_hash")
+        } for result in results if result.get("content_hash") not in saved])
+
     def get_quality_summary(self, analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Generate quality summary from multiple analyses
@@ -227,11 +516,14 @@ class PromptAnalyzer:
         count = 0
 
         for analysis in analyses:
+            # The overall ("general") score summarizes the dimensions; counting
+            # it as one would skew the average and add a fifth radar axis
+            if analysis["type"] == "general":
+                continue
             if analysis["score"] is not None:
                 dimension_scores[analysis["type"]] = analysis["score"]
-                if analysis["type"] != "general":  # Don't double count general
-                    total_score += analysis["score"]
-                    count += 1
+                total_score += analysis["score"]
+                count += 1
 
         average_score = total_score / count if count > 0 else None
 
@@ -0,0 +1,103 @@
+"""
+Persistent exact/semantic cache for test outputs
+"""
+import hashlib
+from typing import Any, Optional
+
+import orjson
+
+from src.api.semantic_cache import semantic_cache
+from src.config import get_config
+from src.db.database import Database
+
+
+def content_hash(payload: Any) -> str:
+    """Stable hex digest of a JSON-serializable payload"""
+    return hashlib.blake2b(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite-backed cache of model outputs keyed on (model, system prompt, input)
+
+    Only deterministic (temperature 0) requests are cached. An exact key match
+    is tried first; if semantic matching is enabled, the input's embedding is
+    then compared against stored entries for the same model and system prompt.
+    Unlike the in-memory response cache, entries survive restarts.
+    """
+
+    def __init__(self, db: Database, threshold: Optional[float] = None, use_embeddings: Optional[bool] = None):
+        """
+        Initialize the cache
+
+        Args:
+            db: Database instance holding the response_cache table
+            threshold: Minimum cosine similarity for a semantic hit (defaults to config)
+            use_embeddings: Enable semantic matching (defaults to ENABLE_SEMANTIC_CACHE)
+        """
+        self.db = db
+        self.threshold = threshold if threshold is not None else get_config().TEST_CACHE_THRESHOLD
+        self.use_embeddings = use_embeddings if use_embeddings is not None else get_config().ENABLE_SEMANTIC_CACHE
+
+    @staticmethod
+    def is_cacheable(temperature: float) -> bool:
+        """Only deterministic requests are cached"""
+        return temperature == 0
+
+    def get(self, model: str, system_prompt: str, test_input: str, temperature: float) -> Optional[str]:
+        """
+        Look up a cached output
+
+        Args:
+            model: Model name
+            system_prompt: System prompt
+            test_input: User input
+            temperature: Sampling temperature
+
+        Returns:
+            Cached output or None
+        """
+        if not self.is_cacheable(temperature):
+            return None
+
+        namespace = content_hash({"model": model, "system": system_prompt})
+        cached = self.db.get_cached_response(content_hash({"namespace": namespace, "input": test_input}))
+        if cached is not None or not self.use_embeddings:
+            return cached
+
+        entries = self.db.get_cached_embeddings(namespace)
+        if not entries:
+            return None
+
+        import numpy as np
+
+        query = semantic_cache.encode(test_input)
+        embeddings = np.stack([np.frombuffer(e["embedding"], dtype=np.float32) for e in entries])
+        similarities = embeddings @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return entries[best]["response"]
+
+    def set(self, model: str, system_prompt: str, test_input: str, temperature: float, response: str):
+        """
+        Store an output
+
+        Args:
+            model: Model name
+            system_prompt: System prompt
+            test_input: User input
+            temperature: Sampling temperature
+            response: Model output
+        """
+        if not self.is_cacheable(temperature):
+            return
+
+        namespace = content_hash({"model": model, "system": system_prompt})
+        embedding = semantic_cache.encode(test_input).tobytes() if self.use_embeddings else None
+        self.db.save_cached_response(
+            key=content_hash({"namespace": namespace, "input": test_input}),
+            namespace=namespace,
+            response=response,
+            embedding=embedding
+        )
@@ -1,11 +1,16 @@
 """
 Prompt data models
 """
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
 
 
+def _utcnow() -> datetime:
+    """Timezone-aware UTC timestamp (avoids the local-timezone lookup)"""
+    return datetime.now(timezone.utc)
+
+
 class PromptVersion(BaseModel):
     """Individual version of a prompt"""
     id: Optional[int] = None
@@ -13,7 +18,7 @@ class PromptVersion(BaseModel):
     version: int
     content: str
     notes: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=_utcnow)
     tags: List[str] = Field(default_factory=list)
 
 
@@ -24,7 +29,7 @@ class AnalysisResult(BaseModel):
     analysis_type: str  # 'clarity', 'completeness', 'efficiency', 'safety', 'general'
     score: Optional[int] = None
     content: str
-    created_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=_utcnow)
 
 
 class TestCase(BaseModel):
@@ -35,7 +40,7 @@ class TestCase(BaseModel):
     input_text: str
     expected_output: Optional[str] = None
     evaluation_criteria: str
-    created_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=_utcnow)
 
 
 class TestResult(BaseModel):
@@ -46,7 +51,7 @@ class TestResult(BaseModel):
     output: str
     score: Optional[float] = None
     evaluation: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=_utcnow)
 
 
 class Prompt(BaseModel):
@@ -55,8 +60,8 @@ class Prompt(BaseModel):
     name: str
     description: Optional[str] = None
     current_version: int = 1
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=_utcnow)
+    updated_at: datetime = Field(default_factory=_utcnow)
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
     class Config:
@@ -1,10 +1,56 @@
 """
 Prompt testing and comparison system
 """
+import asyncio
 import re
-from typing import List, Dict, Any, Optional
-from src.api.anthropic_client import AnthropicClient
-from src.db.database import Database
+import string
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from src.api.anthropic_client import AnthropicClient, cached_system
+from src.api.async_bridge import run_sync
+from src.config import get_config
+from src.core.llm_cache import LLMCache, content_hash
+from src.db.database import Database, PromptVersionModel, TestCaseModel
+
+_SCORE_RE = re.compile(r"SCORE:\s*(\d+)")
+
+# Judge instructions shared by every evaluation; kept byte-identical so the
+# cached prefix matches across calls.
+_JUDGE_SYSTEM = """You are an expert evaluator. Evaluate the output provided by the user based on the criteria provided.
+
+Provide:
+1. Score from 0-100
+2. What was done well
+3. What could be improved
+4. Whether it meets the criteria
+
+Format:
+SCORE: [0-100]
+
+STRENGTHS:
+[What was done well]
+
+WEAKNESSES:
+[What could be improved]
+
+VERDICT:
+[Does it meet the criteria? Yes/No and why]
+"""
+
+# Per-call parts of the judge request, filled in by _build_eval_request
+_JUDGE_CRITERIA = string.Template("""Evaluation Criteria:
+$criteria
+""")
+_JUDGE_EXPECTED = string.Template("""
+Expected Output:
+---
+$expected
+---
+""")
+_JUDGE_OUTPUT = string.Template("""Actual Output:
+---
+$output
+---""")
 
 
 class PromptTester:
@@ -20,13 +66,15 @@ class PromptTester:
         """
         self.client = client
         self.db = db
+        self.cache = LLMCache(db)
 
     def run_test(
         self,
         version_id: int,
         test_case_id: int,
         system_prompt: str,
-        save_result: bool = True
+        save_result: bool = True,
+        test_case: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Run a single test case against a prompt version
@@ -36,55 +84,160 @@ class PromptTester:
             test_case_id: Test case ID
             system_prompt: System prompt to test
             save_result: Whether to save result to database
+            test_case: Already-loaded test case fields (as returned by
+                ``get_test_cases``); skips the database lookup
 
         Returns:
             Test result dictionary
         """
-        # Get test case
-        session = self.db.get_session()
-        try:
-            from src.db.database import TestCaseModel
-            test_case = session.query(TestCaseModel).filter_by(id=test_case_id).first()
+        if test_case is None:
+            # Load the test case and release the session before the API calls,
+            # so no connection (or SQLite lock) is held while waiting on them
+            with self.db.session_scope() as session:
+                row = session.get(TestCaseModel, test_case_id)
 
-            if not test_case:
-                raise ValueError(f"Test case {test_case_id} not found")
+                if not row:
+                    raise ValueError(f"Test case {test_case_id} not found")
 
-            # Run the test
-            output = self.client.test_prompt(
-                system_prompt=system_prompt,
-                test_input=test_case.input_text
-            )
+                test_case = {
+                    "id": row.id,
+                    "name": row.name,
+                    "input_text": row.input_text,
+                    "expected_output": row.expected_output,
+                    "evaluation_criteria": row.evaluation_criteria
+                }
 
-            # Evaluate the output
-            evaluation = self._evaluate_output(
-                output=output,
-                expected=test_case.expected_output,
-                criteria=test_case.evaluation_criteria
-            )
+        result = self._run_test_inplace(test_case, system_prompt)
 
-            score = self._extract_score_from_evaluation(evaluation)
+        if save_result:
+            self._save_results(version_id, [result])
 
-            result = {
-                "test_case_id": test_case_id,
-                "test_name": test_case.name,
-                "output": output,
-                "score": score,
-                "evaluation": evaluation
-            }
+        return result
+
+    def _run_test_inplace(self, test_case: Dict[str, Any], system_prompt: str) -> Dict[str, Any]:
+        """
+        Run an already-loaded test case without touching the database
+
+        Args:
+            test_case: Test case fields (id, name, input_text, expected_output, evaluation_criteria)
+            system_prompt: System prompt to test
+
+        Returns:
+            Test result dictionary
+        """
+        key = self._result_key(system_prompt, test_case)
+        if key is not None:
+            stored = self.db.find_test_results([key]).get(key)
+            if stored is not None:
+                return self._stored_result(test_case, stored)
+
+        output = self._generate(system_prompt, test_case["input_text"])
+
+        evaluation = self._evaluate_output(
+            output=output,
+            expected=test_case["expected_output"],
+            criteria=test_case["evaluation_criteria"]
+        )
 
-            if save_result:
-                self.db.save_test_result(
-                    test_case_id=test_case_id,
-                    version_id=version_id,
-                    output=output,
-                    score=score,
-                    evaluation=evaluation
-                )
+        return {
+            "test_case_id": test_case["id"],
+            "test_name": test_case["name"],
+            "output": output,
+            "score": self._extract_score_from_evaluation(evaluation),
+            "evaluation": evaluation,
+            "content_hash": key,
+            "reused": False
+        }
+
+    def _result_key(self, system_prompt: str, test_case: Dict[str, Any]) -> Optional[str]:
+        """
+        Content hash under which a test result may be stored and reused
+
+        Only deterministic (temperature 0) runs are keyed, following the
+        same rule as the output cache; sampled runs always call the API.
+
+        Args:
+            system_prompt: System prompt tested
+            test_case: Test case fields
 
-            return result
+        Returns:
+            Hex digest, or None when the run is not deterministic
+        """
+        if not self.cache.is_cacheable(get_config().TEMPERATURE):
+            return None
+
+        return content_hash({
+            "model": get_config().DEFAULT_MODEL,
+            "system": system_prompt,
+            "input": test_case["input_text"],
+            "expected": test_case["expected_output"],
+            "criteria": test_case["evaluation_criteria"]
+        })
+
+    def _stored_results(self, system_prompt: str, test_cases: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """
+        Look up reusable results for several test cases in one query
 
-        finally:
-            session.close()
+        Args:
+            system_prompt: System prompt tested
+            test_cases: Test case fields
+
+        Returns:
+            Test result dictionaries keyed by test case ID (hits only)
+        """
+        keys = {tc["id"]: self._result_key(system_prompt, tc) for tc in test_cases}
+        if None in keys.values():
+            return {}
+
+        stored = self.db.find_test_results(list(keys.values()))
+        return {
+            tc["id"]: self._stored_result(tc, stored[keys[tc["id"]]])
+            for tc in test_cases if keys[tc["id"]] in stored
+        }
+
+    @staticmethod
+    def _stored_result(test_case: Dict[str, Any], stored: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a test result dictionary from a stored result row"""
+        return {
+            "test_case_id": test_case["id"],
+            "test_name": test_case["name"],
+            "output": stored["output"],
+            "score": stored["score"],
+            "evaluation": stored["evaluation"],
+            "content_hash": stored["content_hash"],
+            "reused": True
+        }
+
+    def _generate(self, system_prompt: str, test_input: str) -> str:
+        """
+        Run a prompt on a test input, reusing a persisted output when possible
+
+        Args:
+            system_prompt: System prompt to test
+            test_input: Test input to send
+
+        Returns:
+            Model output
+        """
+        model, temperature = get_config().DEFAULT_MODEL, get_config().TEMPERATURE
+
+        output = self.cache.get(model, system_prompt, test_input, temperature)
+        if output is None:
+            output = self.client.test_prompt(system_prompt=system_prompt, test_input=test_input)
+            self.cache.set(model, system_prompt, test_input, temperature, output)
+
+        return output
+
+    async def _agenerate(self, system_prompt: str, test_input: str) -> str:
+        """Async variant of ``_generate``"""
+        model, temperature = get_config().DEFAULT_MODEL, get_config().TEMPERATURE
+
+        output = await asyncio.to_thread(self.cache.get, model, system_prompt, test_input, temperature)
+        if output is None:
+            output = await self.client.atest_prompt(system_prompt=system_prompt, test_input=test_input)
+            await asyncio.to_thread(self.cache.set, model, system_prompt, test_input, temperature, output)
+
+        return output
 
     def _evaluate_output(
         self,
@@ -103,64 +256,229 @@ class PromptTester:
         Returns:
             Evaluation text
         """
-        eval_prompt = f"""You are an expert evaluator. Evaluate the following output based on the criteria provided.
+        system_blocks, user_message = self._build_eval_request(output, expected, criteria)
+        return self.client.create_message_cached(system_blocks=system_blocks, user=user_message)
 
-Evaluation Criteria:
-{criteria}
+    async def _aevaluate_output(
+        self,
+        output: str,
+        expected: Optional[str],
+        criteria: str
+    ) -> str:
+        """Async variant of ``_evaluate_output``"""
+        system_blocks, user_message = self._build_eval_request(output, expected, criteria)
+        return await self.client.acreate_message(prompt=user_message, system_prompt=system_blocks)
 
-"""
+    def _build_eval_request(
+        self,
+        output: str,
+        expected: Optional[str],
+        criteria: str
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Build the judge request for a test output
+
+        The judge instructions and the test case's criteria/expected output
+        go in cached system blocks; only the output being judged changes
+        between calls.
+
+        Args:
+            output: Model output to evaluate
+            expected: Expected output (optional)
+            criteria: Evaluation criteria
+
+        Returns:
+            (system blocks, user message)
+        """
+        test_case_text = _JUDGE_CRITERIA.substitute(criteria=criteria)
         if expected:
-            eval_prompt += f"""Expected Output:
----
-{expected}
----
+            test_case_text += _JUDGE_EXPECTED.substitute(expected=expected)
 
-"""
+        return cached_system(_JUDGE_SYSTEM, test_case_text), _JUDGE_OUTPUT.substitute(output=output)
 
-        eval_prompt += f"""Actual Output:
----
-{output}
----
+    def _extract_score_from_evaluation(self, evaluation: str) -> Optional[float]:
+        """Extract numeric score from evaluation text"""
+        match = _SCORE_RE.search(evaluation)
+        return float(match.group(1)) if match else None
 
-Provide:
-1. Score from 0-100
-2. What was done well
-3. What could be improved
-4. Whether it meets the criteria
+    def run_all_tests(
+        self,
+        prompt_id: int,
+        version_id: int,
+        system_prompt: str,
+        mode: str = "online",
+        batch_timeout: Optional[float] = None,
+        batch_ids: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run all test cases for a prompt
 
-Format:
-SCORE: [0-100]
+        In "online" mode this is a sync wrapper around ``arun_all_tests`` for
+        Streamlit callers; the coroutine runs on the shared background loop
+        (see ``run_sync``). When called from a thread that already runs an
+        event loop (where blocking on it would stall that loop), the sync
+        tests are fanned out over a thread pool instead; the SDK releases
+        the GIL on network I/O. "batch" mode goes through the Message
+        Batches API (see ``_run_all_tests_batch``).
 
-STRENGTHS:
-[What was done well]
+        Args:
+            prompt_id: Prompt ID
+            version_id: Version ID being tested
+            system_prompt: System prompt to test
+            mode: 'online' or 'batch'
+            batch_timeout: See ``_run_all_tests_batch``
+            batch_ids: See ``_run_all_tests_batch``
 
-WEAKNESSES:
-[What could be improved]
+        Returns:
+            List of test results
+        """
+        if mode == "batch":
+            return self._run_all_tests_batch(
+                prompt_id, version_id, system_prompt, timeout=batch_timeout, batch_ids=batch_ids
+            )
+        if mode != "online":
+            raise ValueError(f"Unknown test mode: {mode}")
 
-VERDICT:
-[Does it meet the criteria? Yes/No and why]
-"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return run_sync(self.arun_all_tests(prompt_id, version_id, system_prompt))
 
-        return self.client.create_message(prompt=eval_prompt)
+        # One query for the test cases and one commit for the results
+        test_cases = self.db.get_test_cases(prompt_id)
+        if not test_cases:
+            return []
 
-    def _extract_score_from_evaluation(self, evaluation: str) -> Optional[float]:
-        """Extract numeric score from evaluation text"""
-        match = re.search(r"SCORE:\s*(\d+)", evaluation)
-        if match:
-            try:
-                return float(match.group(1))
-            except (ValueError, IndexError):
-                pass
-        return None
+        with ThreadPoolExecutor(max_workers=min(len(test_cases), get_config().MAX_CONCURRENCY)) as executor:
+            results = list(executor.map(
+                lambda test_case: self._run_test_inplace(test_case, system_prompt),
+                test_cases
+            ))
+        self._save_results(version_id, results)
 
-    def run_all_tests(
+        return results
+
+    def _run_all_tests_batch(
+        self,
+        prompt_id: int,
+        version_id: int,
+        system_prompt: str,
+        timeout: Optional[float] = None,
+        batch_ids: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run all test cases for a prompt through the Message Batches API
+
+        Generations go out as one batch and judge evaluations as a second,
+        matched back to their test case by custom_id. Batches cost about half
+        as much as online calls but can take minutes, so this suits larger
+        suites. Generations already in the LLM cache are reused rather than
+        batched, and batched ones are stored there. Requests that fail inside a
+        batch are retried online.
+
+        Args:
+            prompt_id: Prompt ID
+            version_id: Version ID being tested
+            system_prompt: System prompt to test
+            timeout: Seconds to wait for each batch before raising TimeoutError (optional)
+            batch_ids: Batch ID by stage ("gen", "eval"); submitted IDs are recorded
+                here, and recorded ones are resumed instead of submitting again
+
+        Returns:
+            List of test results
+
+        Raises:
+            TimeoutError: If a batch is still running after ``timeout``
+        """
+        batch_ids = {} if batch_ids is None else batch_ids
+
+        all_test_cases = self.db.get_test_cases(prompt_id)
+        if not all_test_cases:
+            return []
+
+        stored = self._stored_results(system_prompt, all_test_cases)
+        test_cases = [tc for tc in all_test_cases if tc["id"] not in stored]
+        if not test_cases:
+            results = [stored[tc["id"]] for tc in all_test_cases]
+            self._save_results(version_id, results)
+            return results
+
+        # Generations already in the LLM cache stay out of the batch
+        model, temperature = get_config().DEFAULT_MODEL, get_config().TEMPERATURE
+        cached = {
+            tc["id"]: self.cache.get(model, system_prompt, tc["input_text"], temperature)
+            for tc in test_cases
+        }
+
+        outputs = self.client.run_batch(
+            [
+                self.client.test_batch_request(f"gen-{tc['id']}", system_prompt, tc["input_text"])
+                for tc in test_cases if cached[tc["id"]] is None
+            ],
+            timeout=timeout,
+            batch_id=batch_ids.get("gen"),
+            on_submit=lambda batch_id: batch_ids.update(gen=batch_id)
+        )
+        for tc in test_cases:
+            if cached[tc["id"]] is not None:
+                outputs[f"gen-{tc['id']}"] = cached[tc["id"]]
+            elif outputs.get(f"gen-{tc['id']}") is None:
+                outputs[f"gen-{tc['id']}"] = self._generate(system_prompt, tc["input_text"])
+            else:
+                self.cache.set(model, system_prompt, tc["input_text"], temperature, outputs[f"gen-{tc['id']}"])
+
+        eval_requests = []
+        for tc in test_cases:
+            system_blocks, user_message = self._build_eval_request(
+                output=outputs[f"gen-{tc['id']}"],
+                expected=tc["expected_output"],
+                criteria=tc["evaluation_criteria"]
+            )
+            eval_requests.append(
+                self.client.batch_request(f"eval-{tc['id']}", user_message, system_prompt=system_blocks)
+            )
+        evaluations = self.client.run_batch(
+            eval_requests,
+            timeout=timeout,
+            batch_id=batch_ids.get("eval"),
+            on_submit=lambda batch_id: batch_ids.update(eval=batch_id)
+        )
+
+        for tc in test_cases:
+            output = outputs[f"gen-{tc['id']}"]
+            evaluation = evaluations.get(f"eval-{tc['id']}")
+            if evaluation is None:
+                evaluation = self._evaluate_output(output, tc["expected_output"], tc["evaluation_criteria"])
+
+            stored[tc["id"]] = {
+                "test_case_id": tc["id"],
+                "test_name": tc["name"],
+                "output": output,
+                "score": self._extract_score_from_evaluation(evaluation),
+                "evaluation": evaluation,
+                "content_hash": self._result_key(system_prompt, tc),
+                "reused": False
+            }
+        results = [stored[tc["id"]] for tc in all_test_cases]
+
+        self._save_results(version_id, results)
+
+        return results
+
+    async def arun_all_tests(
         self,
         prompt_id: int,
         version_id: int,
         system_prompt: str
     ) -> List[Dict[str, Any]]:
         """
-        Run all test cases for a prompt
+        Run all test cases for a prompt concurrently
+
+        Stored results of identical deterministic runs are reused (see
+        ``_result_key``). All remaining generations are sent at once, then all
+        judge evaluations; the client's semaphore and rate limiter bound how
+        many are in flight.
+        Results are saved in one transaction once every test has finished.
 
         Args:
             prompt_id: Prompt ID
@@ -170,24 +488,71 @@ VERDICT:
         Returns:
             List of test results
         """
-        test_cases = self.db.get_test_cases(prompt_id)
-        results = []
-
-        for test_case in test_cases:
-            result = self.run_test(
-                version_id=version_id,
-                test_case_id=test_case["id"],
-                system_prompt=system_prompt,
-                save_result=True
+        test_cases = await asyncio.to_thread(self.db.get_test_cases, prompt_id)
+        if not test_cases:
+            return []
+
+        stored = await asyncio.to_thread(self._stored_results, system_prompt, test_cases)
+        pending = [tc for tc in test_cases if tc["id"] not in stored]
+
+        outputs = await asyncio.gather(*[
+            self._agenerate(system_prompt, tc["input_text"])
+            for tc in pending
+        ])
+
+        evaluations = await asyncio.gather(*[
+            self._aevaluate_output(
+                output=output,
+                expected=tc["expected_output"],
+                criteria=tc["evaluation_criteria"]
             )
-            results.append(result)
+            for tc, output in zip(pending, outputs)
+        ])
+
+        for tc, output, evaluation in zip(pending, outputs, evaluations):
+            stored[tc["id"]] = {
+                "test_case_id": tc["id"],
+                "test_name": tc["name"],
+                "output": output,
+                "score": self._extract_score_from_evaluation(evaluation),
+                "evaluation": evaluation,
+                "content_hash": self._result_key(system_prompt, tc),
+                "reused": False
+            }
+        results = [stored[tc["id"]] for tc in test_cases]
+
+        await asyncio.to_thread(self._save_results, version_id, results)
 
         return results
 
+    def _save_results(self, version_id: int, results: List[Dict[str, Any]]):
+        """
+        Persist a list of test results for a version in one transaction
+
+        Newly produced results are always saved. Reused results are saved only
+        if the version doesn't have them yet (e.g. an identical prompt tested
+        under another version), so re-running doesn't pile up duplicate rows.
+        """
+        reused = [r["content_hash"] for r in results if r.get("reused")]
+        saved = self.db.find_test_result_hashes(version_id, reused)
+        results = [r for r in results if not (r.get("reused") and r["content_hash"] in saved)]
+        if not results:
+            return
+
+        self.db.save_test_results_batch([{
+            "test_case_id": r["test_case_id"],
+            "version_id": version_id,
+            "output": r["output"],
+            "score": r["score"],
+            "evaluation": r["evaluation"],
+            "content_hash": r.get("content_hash")
+        } for r in results])
+
     def compare_versions(
         self,
         version_ids: List[int],
-        test_case_id: int
+        test_case_id: int,
+        mode: str = "online"
     ) -> Dict[str, Any]:
         """
         Compare multiple prompt versions on a single test case
@@ -195,53 +560,37 @@ VERDICT:
         Args:
             version_ids: List of version IDs to compare
             test_case_id: Test case to run
+            mode: 'online', or 'batch' to generate the version outputs via the Message Batches API
 
         Returns:
             Comparison result
         """
-        responses = []
-
-        for version_id in version_ids:
-            version = self.db.get_version(version_id)
-            if not version:
-                continue
+        if mode not in ("online", "batch"):
+            raise ValueError(f"Unknown test mode: {mode}")
 
-            # Get test case
-            session = self.db.get_session()
-            try:
-                from src.db.database import TestCaseModel
-                test_case = session.query(TestCaseModel).filter_by(id=test_case_id).first()
-
-                if not test_case:
-                    continue
+        # Load the test case and every version in one short transaction
+        with self.db.session_scope() as session:
+            test_case = session.get(TestCaseModel, test_case_id)
+            if not test_case:
+                return {"error": "No valid versions to compare"}
+            test_input = test_case.input_text
+            criteria = test_case.evaluation_criteria or "Quality and correctness"
 
-                # Run test
-                output = self.client.test_prompt(
-                    system_prompt=version["content"],
-                    test_input=test_case.input_text
-                )
+            rows = session.query(
+                PromptVersionModel.id, PromptVersionModel.version, PromptVersionModel.content
+            ).filter(PromptVersionModel.id.in_(version_ids)).all()
 
-                responses.append({
-                    "name": f"Version {version['version']}",
-                    "response": output,
-                    "version_id": version_id
-                })
+        by_id = {row.id: row for row in rows}
+        versions = [by_id[version_id] for version_id in version_ids if version_id in by_id]
 
-            finally:
-                session.close()
+        if mode == "batch":
+            responses = self._generate_version_outputs_batch(versions, test_input)
+        else:
+            responses = self._generate_version_outputs(versions, test_input)
 
         if not responses:
             return {"error": "No valid versions to compare"}
 
-        # Get evaluation criteria
-        session = self.db.get_session()
-        try:
-            from src.db.database import TestCaseModel
-            test_case = session.query(TestCaseModel).filter_by(id=test_case_id).first()
-            criteria = test_case.evaluation_criteria if test_case else "Quality and correctness"
-        finally:
-            session.close()
-
         # Compare using Claude
         comparison = self.client.compare_responses(
             responses=responses,
@@ -254,41 +603,103 @@ VERDICT:
             "comparison": comparison
         }
 
-    def get_test_summary(self, version_id: int) -> Dict[str, Any]:
+    def _generate_version_outputs(self, versions: List[Any], test_input: str) -> List[Dict[str, Any]]:
         """
-        Get summary of test results for a version
+        Generate each version's output for a test input with online calls
+
+        The calls run concurrently on the shared background loop (see
+        ``run_sync``), or on a thread pool when called from a thread that
+        already runs an event loop.
 
         Args:
-            version_id: Version ID
+            versions: Version rows with id, version and content
+            test_input: Test input to send
 
         Returns:
-            Summary dictionary
+            Responses in the shape ``compare_responses`` expects
         """
-        results = self.db.get_test_results(version_id)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            outputs = run_sync(self._agenerate_version_outputs(versions, test_input))
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(versions), get_config().MAX_CONCURRENCY) or 1) as executor:
+                outputs = list(executor.map(
+                    lambda v: self.client.test_prompt(system_prompt=v.content, test_input=test_input),
+                    versions
+                ))
+
+        return [{
+            "name": f"Version {v.version}",
+            "response": output,
+            "version_id": v.id
+        } for v, output in zip(versions, outputs)]
+
+    async def _agenerate_version_outputs(self, versions: List[Any], test_input: str) -> List[str]:
+        """Run every version on the test input concurrently, returning outputs in order"""
+        return await asyncio.gather(*[
+            self.client.atest_prompt(system_prompt=v.content, test_input=test_input)
+            for v in versions
+        ])
+
+    def _generate_version_outputs_batch(self, versions: List[Any], test_input: str) -> List[Dict[str, Any]]:
+        """
+        Generate each version's output for a test input in one batch
 
-        if not results:
-            return {
-                "total_tests": 0,
-                "average_score": None,
-                "passed": 0,
-                "failed": 0
-            }
+        Args:
+            versions: Version rows with id, version and content
+            test_input: Test input to send
+
+        Returns:
+            Responses in the shape ``compare_responses`` expects
+        """
+        outputs = self.client.run_batch([
+            self.client.test_batch_request(f"version-{v.id}", v.content, test_input)
+            for v in versions
+        ])
 
-        scores = [r["score"] for r in results if r["score"] is not None]
-        average_score = sum(scores) / len(scores) if scores else None
+        responses = []
+        for v in versions:
+            output = outputs.get(f"version-{v.id}")
+            if output is None:
+                output = self.client.test_prompt(system_prompt=v.content, test_input=test_input)
+            responses.append({
+                "name": f"Version {v.version}",
+                "response": output,
+                "version_id": v.id
+            })
+
+        return responses
+
+    def get_test_summary(self, version_id: int, include_results: bool = False) -> Dict[str, Any]:
+        """
+        Get summary of test results for a version
 
+        The counts and average are computed in SQL; the individual results
+        are only loaded when asked for.
+
+        Args:
+            version_id: Version ID
+            include_results: Also return the individual results under "results"
+
+        Returns:
+            Summary dictionary
+        """
         # Consider >= 70 as passing
-        passed = sum(1 for s in scores if s >= 70)
-        failed = len(scores) - passed
+        stats = self.db.summarize_version(version_id, pass_threshold=70)
 
-        return {
-            "total_tests": len(results),
-            "average_score": average_score,
-            "passed": passed,
-            "failed": failed,
-            "results": results
+        summary = {
+            "total_tests": stats["total"],
+            "average_score": stats["average_score"],
+            "passed": stats["passed"],
+            "failed": stats["failed"]
         }
 
+        if include_results:
+            summary["results"] = self.db.get_test_results(version_id) if stats["total"] else []
+
+        return summary
+
     def generate_test_report(self, prompt_id: int, version_id: int) -> str:
         """
         Generate a comprehensive test report
@@ -301,28 +712,34 @@ VERDICT:
             Formatted report string
         """
         summary = self.get_test_summary(version_id)
+        # Only the first 100 characters of each output are shown
+        results = self.db.get_test_results(version_id, preview_len=100, include_eval=False)
         version = self.db.get_version(version_id)
 
-        report = f"""# Test Report
+        average_score = summary["average_score"]
+        average_str = f"{average_score:.2f}" if average_score is not None else "N/A"
+
+        parts = [f"""# Test Report
 
 ## Version Information
 - Version: {version['version'] if version else 'Unknown'}
-- Tested at: {summary['results'][0]['created_at'] if summary['results'] else 'N/A'}
+- Tested at: {results[0]['created_at'] if results else 'N/A'}
 
 ## Summary
 - Total Tests: {summary['total_tests']}
-- Average Score: {summary['average_score']:.2f if summary['average_score'] else 'N/A'}
+- Average Score: {average_str}
 - Passed: {summary['passed']}
 - Failed: {summary['failed']}
 
 ## Individual Test Results
 
-"""
-        for i, result in enumerate(summary.get('results', []), 1):
-            report += f"""### Test {i}
-- Score: {result['score'] if result['score'] else 'N/A'}
+"""]
+        parts.extend(f"""### Test {i}
+- Score: {result['score'] if result['score'] is not None else 'N/A'}
 - Output Preview: {result['output'][:100]}...
 
 """
+            for i, result in enumerate(results, 1)
+        )
 
-        return report
+        return "".join(parts)
@@ -1,16 +1,77 @@
 """
 Database management using SQLAlchemy
 """
+import copy
+import functools
 import json
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, ForeignKey, JSON
+from typing import Iterator, List, Optional, Dict, Any, Set
+from sqlalchemy import create_engine, event, func, insert, inspect, text, Column, Integer, String, Text, DateTime, Float, ForeignKey, Index, JSON, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship, Session
-from src.config import config
+from src.api.response_cache import InMemoryResponseCache
+from src.config import get_config
 
 Base = declarative_base()
 
+# Display format of the *_fmt timestamp fields returned by list methods
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def _cached_read(method):
+    """
+    Serve a read method from the instance's short-lived read cache
+
+    Callers get a deep copy, so mutating a returned list or dict can't
+    change what later reads return.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        value = self._read_cache.get(key)
+        if value is None:
+            value = method(self, *args, **kwargs)
+            if value is not None:
+                self._read_cache.set(key, value)
+        return copy.deepcopy(value)
+    return wrapper
+
+
+def _invalidates_reads(method):
+    """Drop the instance's read cache after a write method runs"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._read_cache.clear()
+    return wrapper
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection for many small concurrent transactions"""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed during a write and avoids a full fsync per commit
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    cursor.close()
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Connection pool settings for a database URL"""
+    options = {"pool_size": get_config().DB_POOL_SIZE, "max_overflow": get_config().DB_MAX_OVERFLOW}
+    if url.startswith("sqlite"):
+        # Sessions are used from worker threads (asyncio.to_thread, thread pools)
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        # Server-side connections can be closed while idle in the pool
+        options["pool_pre_ping"] = True
+    return options
+
 
 class PromptModel(Base):
     """SQLAlchemy model for Prompt"""
@@ -22,7 +83,8 @@ class PromptModel(Base):
     current_version = Column(Integer, default=1)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    metadata = Column(JSON, default=dict)
+    # "metadata" is reserved on declarative classes; the column keeps its name
+    meta = Column("metadata", JSON, default=dict)
 
     # Relationships
     versions = relationship("PromptVersionModel", back_populates="prompt", cascade="all, delete-orphan")
@@ -32,6 +94,10 @@ class PromptModel(Base):
 class PromptVersionModel(Base):
     """SQLAlchemy model for PromptVersion"""
     __tablename__ = "prompt_versions"
+    __table_args__ = (
+        # Also serves lookups on prompt_id alone (leftmost column)
+        Index("ix_pv_prompt_version", "prompt_id", "version"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     prompt_id = Column(Integer, ForeignKey("prompts.id"), nullable=False)
@@ -52,10 +118,12 @@ class AnalysisResultModel(Base):
     __tablename__ = "analysis_results"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    version_id = Column(Integer, ForeignKey("prompt_versions.id"), nullable=False)
+    version_id = Column(Integer, ForeignKey("prompt_versions.id"), nullable=False, index=True)
     analysis_type = Column(String(50), nullable=False)
     score = Column(Integer, nullable=True)
     content = Column(Text, nullable=False)
+    # Digest of (model, analysis type, prompt content), used to reuse analyses
+    content_hash = Column(String(32), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.now)
 
     # Relationships
@@ -67,7 +135,7 @@ class TestCaseModel(Base):
     __tablename__ = "test_cases"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    prompt_id = Column(Integer, ForeignKey("prompts.id"), nullable=False)
+    prompt_id = Column(Integer, ForeignKey("prompts.id"), nullable=False, index=True)
     name = Column(String(255), nullable=False)
     input_text = Column(Text, nullable=False)
     expected_output = Column(Text, nullable=True)
@@ -84,11 +152,13 @@ class TestResultModel(Base):
     __tablename__ = "test_results"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    test_case_id = Column(Integer, ForeignKey("test_cases.id"), nullable=False)
-    version_id = Column(Integer, ForeignKey("prompt_versions.id"), nullable=False)
+    test_case_id = Column(Integer, ForeignKey("test_cases.id"), nullable=False, index=True)
+    version_id = Column(Integer, ForeignKey("prompt_versions.id"), nullable=False, index=True)
     output = Column(Text, nullable=False)
     score = Column(Float, nullable=True)
     evaluation = Column(Text, nullable=True)
+    # Digest of the test inputs (set only for deterministic runs), used to reuse results
+    content_hash = Column(String(32), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.now)
 
     # Relationships
@@ -96,26 +166,92 @@ class TestResultModel(Base):
     version = relationship("PromptVersionModel", back_populates="test_results")
 
 
+class ResponseCacheModel(Base):
+    """SQLAlchemy model for persisted LLM responses"""
+    __tablename__ = "response_cache"
+
+    key = Column(String(64), primary_key=True)
+    namespace = Column(String(64), nullable=False, index=True)
+    embedding = Column(LargeBinary, nullable=True)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+
 class Database:
     """Database manager"""
 
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, read_cache_ttl: float = 30.0):
         """
         Initialize database
 
+        Every operation checks a connection out of the engine's pool for the
+        duration of one session and returns it on close, so one instance can
+        be shared by all Streamlit sessions.
+
         Args:
-            db_path: Path to SQLite database file
+            db_path: Path to SQLite database file. When omitted, DATABASE_URL
+                is used if set, otherwise DATABASE_PATH
+            read_cache_ttl: Seconds prompt, version and test case reads are memoized.
+                Writes through this instance clear the cache; writes from other
+                instances become visible within this window
         """
-        self.db_path = db_path or config.DATABASE_PATH
-        self.engine = create_engine(f"sqlite:///{self.db_path}")
+        self.db_path = db_path or get_config().DATABASE_PATH
+        if db_path is None and get_config().DATABASE_URL:
+            url = get_config().DATABASE_URL
+        else:
+            url = f"sqlite:///{self.db_path}"
+        self._read_cache = InMemoryResponseCache(maxsize=1024, ttl=read_cache_ttl)
+        self.engine = create_engine(url, **_engine_options(url))
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", _set_sqlite_pragmas)
         Base.metadata.create_all(self.engine)
+        self._add_missing_columns()
+        self._create_missing_indexes()
         self.SessionLocal = sessionmaker(bind=self.engine)
 
+    def _add_missing_columns(self):
+        """Add nullable columns introduced after a database file was first created"""
+        # create_all never alters existing tables
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing:
+                        column_type = column.type.compile(dialect=self.engine.dialect)
+                        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+    def _create_missing_indexes(self):
+        """Add indexes introduced after a database file was first created"""
+        # create_all only creates indexes together with new tables
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
+
     def get_session(self) -> Session:
         """Get a new database session"""
         return self.SessionLocal()
 
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """
+        Provide a transactional scope around a series of operations
+
+        Commits when the block exits normally, rolls back on error and always
+        closes the session.
+        """
+        session = self.get_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     # Prompt operations
+    @_invalidates_reads
     def create_prompt(self, name: str, description: Optional[str] = None, content: str = "") -> int:
         """
         Create a new prompt
@@ -147,6 +283,7 @@ class Database:
         finally:
             session.close()
 
+    @_cached_read
     def get_prompt(self, prompt_id: int) -> Optional[Dict[str, Any]]:
         """Get prompt by ID"""
         session = self.get_session()
@@ -162,27 +299,62 @@ class Database:
                 "current_version": prompt.current_version,
                 "created_at": prompt.created_at,
                 "updated_at": prompt.updated_at,
-                "metadata": prompt.metadata
+                "metadata": prompt.meta
             }
         finally:
             session.close()
 
-    def list_prompts(self) -> List[Dict[str, Any]]:
-        """List all prompts"""
+    @_cached_read
+    def list_prompts(self, include_current: bool = False) -> List[Dict[str, Any]]:
+        """
+        List all prompts
+
+        Args:
+            include_current: Also return each prompt's current version
+                (current_version_id, current_content) via a single LEFT JOIN
+
+        Returns:
+            List of prompt dictionaries, most recently updated first
+        """
         session = self.get_session()
         try:
-            prompts = session.query(PromptModel).order_by(PromptModel.updated_at.desc()).all()
+            if not include_current:
+                prompts = session.query(PromptModel).order_by(PromptModel.updated_at.desc()).all()
+                return [{
+                    "id": p.id,
+                    "name": p.name,
+                    "description": p.description,
+                    "current_version": p.current_version,
+                    "created_at": p.created_at,
+                    "updated_at": p.updated_at,
+                    "updated_at_fmt": p.updated_at.strftime(TIMESTAMP_FORMAT)
+                } for p in prompts]
+
+            rows = session.query(
+                PromptModel,
+                PromptVersionModel.id.label("current_version_id"),
+                PromptVersionModel.content.label("current_content")
+            ).outerjoin(
+                PromptVersionModel,
+                (PromptVersionModel.prompt_id == PromptModel.id)
+                & (PromptVersionModel.version == PromptModel.current_version)
+            ).order_by(PromptModel.updated_at.desc()).all()
+
             return [{
                 "id": p.id,
                 "name": p.name,
                 "description": p.description,
                 "current_version": p.current_version,
                 "created_at": p.created_at,
-                "updated_at": p.updated_at
-            } for p in prompts]
+                "updated_at": p.updated_at,
+                "updated_at_fmt": p.updated_at.strftime(TIMESTAMP_FORMAT),
+                "current_version_id": current_version_id,
+                "current_content": current_content
+            } for p, current_version_id, current_content in rows]
         finally:
             session.close()
 
+    @_invalidates_reads
     def update_prompt(self, prompt_id: int, **kwargs):
         """Update prompt metadata"""
         session = self.get_session()
@@ -190,6 +362,8 @@ class Database:
             prompt = session.query(PromptModel).filter_by(id=prompt_id).first()
             if prompt:
                 for key, value in kwargs.items():
+                    if key == "metadata":
+                        key = "meta"
                     if hasattr(prompt, key):
                         setattr(prompt, key, value)
                 prompt.updated_at = datetime.now()
@@ -197,6 +371,7 @@ class Database:
         finally:
             session.close()
 
+    @_invalidates_reads
     def delete_prompt(self, prompt_id: int):
         """Delete a prompt and all related data"""
         session = self.get_session()
@@ -209,6 +384,7 @@ class Database:
             session.close()
 
     # Version operations
+    @_invalidates_reads
     def create_version(self, prompt_id: int, content: str, notes: Optional[str] = None) -> int:
         """Create a new version of a prompt"""
         session = self.get_session()
@@ -234,6 +410,7 @@ class Database:
         finally:
             session.close()
 
+    @_cached_read
     def get_version(self, version_id: int) -> Optional[Dict[str, Any]]:
         """Get specific version"""
         session = self.get_session()
@@ -254,6 +431,7 @@ class Database:
         finally:
             session.close()
 
+    @_cached_read
     def get_current_version(self, prompt_id: int) -> Optional[Dict[str, Any]]:
         """Get current version of a prompt"""
         session = self.get_session()
@@ -282,26 +460,53 @@ class Database:
         finally:
             session.close()
 
-    def list_versions(self, prompt_id: int) -> List[Dict[str, Any]]:
-        """List all versions of a prompt"""
+    @_cached_read
+    def list_versions(self, prompt_id: int, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        List versions of a prompt, newest first
+
+        Args:
+            prompt_id: Prompt ID
+            limit: Maximum number of versions to return (optional)
+            offset: Number of versions to skip
+
+        Returns:
+            List of version dictionaries with truncated content
+        """
         session = self.get_session()
         try:
-            versions = session.query(PromptVersionModel).filter_by(
-                prompt_id=prompt_id
-            ).order_by(PromptVersionModel.version.desc()).all()
+            # Truncate in SQL so full version contents are never loaded
+            versions = session.query(
+                PromptVersionModel.id,
+                PromptVersionModel.version,
+                func.substr(PromptVersionModel.content, 1, 100).label("content_preview"),
+                func.length(PromptVersionModel.content).label("content_length"),
+                PromptVersionModel.notes,
+                PromptVersionModel.created_at
+            ).filter(
+                PromptVersionModel.prompt_id == prompt_id
+            ).order_by(PromptVersionModel.version.desc()).limit(limit).offset(offset).all()
 
             return [{
                 "id": v.id,
                 "version": v.version,
-                "content": v.content[:100] + "..." if len(v.content) > 100 else v.content,
+                "content": v.content_preview + "..." if v.content_length > 100 else v.content_preview,
                 "notes": v.notes,
-                "created_at": v.created_at
+                "created_at": v.created_at,
+                "created_at_fmt": v.created_at.strftime(TIMESTAMP_FORMAT)
             } for v in versions]
         finally:
             session.close()
 
     # Analysis operations
-    def save_analysis(self, version_id: int, analysis_type: str, content: str, score: Optional[int] = None) -> int:
+    def save_analysis(
+        self,
+        version_id: int,
+        analysis_type: str,
+        content: str,
+        score: Optional[int] = None,
+        content_hash: Optional[str] = None
+    ) -> int:
         """Save analysis result"""
         session = self.get_session()
         try:
@@ -309,7 +514,8 @@ class Database:
                 version_id=version_id,
                 analysis_type=analysis_type,
                 score=score,
-                content=content
+                content=content,
+                content_hash=content_hash
             )
             session.add(analysis)
             session.commit()
@@ -317,6 +523,81 @@ class Database:
         finally:
             session.close()
 
+    def save_analyses_batch(self, records: List[Dict[str, Any]]):
+        """
+        Save several analysis results in a single transaction
+
+        Args:
+            records: Dicts with version_id, analysis_type, content, score and
+                optionally content_hash
+        """
+        if not records:
+            return
+
+        now = datetime.now()
+        rows = [{
+            "version_id": r["version_id"],
+            "analysis_type": r["analysis_type"],
+            "content": r["content"],
+            "score": r.get("score"),
+            "content_hash": r.get("content_hash"),
+            "created_at": now
+        } for r in records]
+
+        session = self.get_session()
+        try:
+            session.execute(insert(AnalysisResultModel), rows)
+            session.commit()
+        finally:
+            session.close()
+
+    def find_analysis(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the most recent analysis stored under a content hash
+
+        Args:
+            content_hash: Digest identifying the analyzed content
+
+        Returns:
+            Dict with content and score, or None
+        """
+        session = self.get_session()
+        try:
+            row = session.query(
+                AnalysisResultModel.content, AnalysisResultModel.score
+            ).filter(
+                AnalysisResultModel.content_hash == content_hash
+            ).order_by(AnalysisResultModel.id.desc()).first()
+
+            return row._asdict() if row else None
+        finally:
+            session.close()
+
+    def find_analysis_hashes(self, version_id: int, content_hashes: List[str]) -> Set[str]:
+        """
+        Get which content hashes already have an analysis saved for a version
+
+        Args:
+            version_id: Version ID
+            content_hashes: Digests to check
+
+        Returns:
+            The subset of content_hashes stored for the version
+        """
+        if not content_hashes:
+            return set()
+
+        session = self.get_session()
+        try:
+            rows = session.query(AnalysisResultModel.content_hash).filter(
+                AnalysisResultModel.version_id == version_id,
+                AnalysisResultModel.content_hash.in_(content_hashes)
+            ).distinct().all()
+
+            return {row.content_hash for row in rows}
+        finally:
+            session.close()
+
     def get_analyses(self, version_id: int) -> List[Dict[str, Any]]:
         """Get all analyses for a version"""
         session = self.get_session()
@@ -330,12 +611,14 @@ class Database:
                 "analysis_type": a.analysis_type,
                 "score": a.score,
                 "content": a.content,
-                "created_at": a.created_at
+                "created_at": a.created_at,
+                "created_at_fmt": a.created_at.strftime(TIMESTAMP_FORMAT)
             } for a in analyses]
         finally:
             session.close()
 
     # Test case operations
+    @_invalidates_reads
     def create_test_case(
         self,
         prompt_id: int,
@@ -360,13 +643,24 @@ class Database:
         finally:
             session.close()
 
-    def get_test_cases(self, prompt_id: int) -> List[Dict[str, Any]]:
-        """Get all test cases for a prompt"""
+    @_cached_read
+    def get_test_cases(self, prompt_id: int, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get test cases for a prompt, oldest first
+
+        Args:
+            prompt_id: Prompt ID
+            limit: Maximum number of test cases to return (optional)
+            offset: Number of test cases to skip
+
+        Returns:
+            List of test case dictionaries
+        """
         session = self.get_session()
         try:
             test_cases = session.query(TestCaseModel).filter_by(
                 prompt_id=prompt_id
-            ).all()
+            ).order_by(TestCaseModel.id).limit(limit).offset(offset).all()
 
             return [{
                 "id": tc.id,
@@ -379,6 +673,7 @@ class Database:
         finally:
             session.close()
 
+    @_invalidates_reads
     def delete_test_case(self, test_case_id: int):
         """Delete a test case"""
         session = self.get_session()
@@ -397,7 +692,8 @@ class Database:
         version_id: int,
         output: str,
         score: Optional[float] = None,
-        evaluation: Optional[str] = None
+        evaluation: Optional[str] = None,
+        content_hash: Optional[str] = None
     ) -> int:
         """Save test result"""
         session = self.get_session()
@@ -407,7 +703,8 @@ class Database:
                 version_id=version_id,
                 output=output,
                 score=score,
-                evaluation=evaluation
+                evaluation=evaluation,
+                content_hash=content_hash
             )
             session.add(result)
             session.commit()
@@ -415,21 +712,196 @@ class Database:
         finally:
             session.close()
 
-    def get_test_results(self, version_id: int) -> List[Dict[str, Any]]:
-        """Get all test results for a version"""
+    def save_test_results_batch(self, records: List[Dict[str, Any]]):
+        """
+        Save several test results in a single transaction
+
+        Args:
+            records: Dicts with test_case_id, version_id, output, score,
+                evaluation and optionally content_hash
+        """
+        if not records:
+            return
+
+        now = datetime.now()
+        rows = [{
+            "test_case_id": r["test_case_id"],
+            "version_id": r["version_id"],
+            "output": r["output"],
+            "score": r.get("score"),
+            "evaluation": r.get("evaluation"),
+            "content_hash": r.get("content_hash"),
+            "created_at": now
+        } for r in records]
+
+        # Plain executemany INSERT: no ORM instances or identity-map bookkeeping
+        with self.session_scope() as session:
+            session.execute(insert(TestResultModel), rows)
+
+    def find_test_results(self, content_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the most recent test result stored under each content hash
+
+        Args:
+            content_hashes: Digests identifying test runs
+
+        Returns:
+            Dict mapping each found hash to its output, score and evaluation
+        """
+        if not content_hashes:
+            return {}
+
         session = self.get_session()
         try:
-            results = session.query(TestResultModel).filter_by(
-                version_id=version_id
+            rows = session.query(
+                TestResultModel.content_hash,
+                TestResultModel.output,
+                TestResultModel.score,
+                TestResultModel.evaluation
+            ).filter(
+                TestResultModel.content_hash.in_(content_hashes)
+            ).order_by(TestResultModel.id).all()
+
+            # Later rows overwrite earlier ones, leaving the most recent
+            return {row.content_hash: row._asdict() for row in rows}
+        finally:
+            session.close()
+
+    def find_test_result_hashes(self, version_id: int, content_hashes: List[str]) -> Set[str]:
+        """
+        Get which content hashes already have a test result saved for a version
+
+        Args:
+            version_id: Version ID
+            content_hashes: Digests to check
+
+        Returns:
+            The subset of content_hashes stored for the version
+        """
+        if not content_hashes:
+            return set()
+
+        session = self.get_session()
+        try:
+            rows = session.query(TestResultModel.content_hash).filter(
+                TestResultModel.version_id == version_id,
+                TestResultModel.content_hash.in_(content_hashes)
+            ).distinct().all()
+
+            return {row.content_hash for row in rows}
+        finally:
+            session.close()
+
+    def summarize_version(self, version_id: int, pass_threshold: float = 70) -> Dict[str, Any]:
+        """
+        Aggregate test results for a version in SQL
+
+        Args:
+            version_id: Version ID
+            pass_threshold: Minimum score counted as passing
+
+        Returns:
+            Dict with total, scored, average_score, passed and failed
+        """
+        score = TestResultModel.score
+        session = self.get_session()
+        try:
+            # Aggregate FILTER clauses need SQLite 3.30+
+            row = session.query(
+                func.count().label("total"),
+                func.count(score).label("scored"),
+                func.avg(score).label("average_score"),
+                func.count().filter(score >= pass_threshold).label("passed"),
+                func.count().filter(score < pass_threshold).label("failed")
+            ).filter(TestResultModel.version_id == version_id).one()
+
+            return row._asdict()
+        finally:
+            session.close()
+
+    def get_test_results(
+        self,
+        version_id: int,
+        preview_len: Optional[int] = None,
+        include_eval: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all test results for a version
+
+        Args:
+            version_id: Version ID
+            preview_len: Truncate output to this many characters in SQL (optional)
+            include_eval: Include the evaluation text
+
+        Returns:
+            List of result dictionaries
+        """
+        output = TestResultModel.output
+        if preview_len is not None:
+            output = func.substr(TestResultModel.output, 1, preview_len)
+
+        columns = [
+            TestResultModel.id,
+            TestResultModel.test_case_id,
+            output.label("output"),
+            TestResultModel.score,
+            TestResultModel.created_at
+        ]
+        if include_eval:
+            columns.append(TestResultModel.evaluation)
+
+        session = self.get_session()
+        try:
+            results = session.query(*columns).filter(
+                TestResultModel.version_id == version_id
             ).all()
 
-            return [{
-                "id": r.id,
-                "test_case_id": r.test_case_id,
-                "output": r.output,
-                "score": r.score,
-                "evaluation": r.evaluation,
-                "created_at": r.created_at
-            } for r in results]
+            return [r._asdict() for r in results]
+        finally:
+            session.close()
+
+    # Response cache operations
+    def get_cached_response(self, key: str) -> Optional[str]:
+        """Get a cached response by exact key"""
+        session = self.get_session()
+        try:
+            entry = session.get(ResponseCacheModel, key)
+            return entry.response if entry else None
+        finally:
+            session.close()
+
+    def get_cached_embeddings(self, namespace: str) -> List[Dict[str, Any]]:
+        """Get the embedded cache entries in a namespace"""
+        session = self.get_session()
+        try:
+            entries = session.query(
+                ResponseCacheModel.embedding, ResponseCacheModel.response
+            ).filter(
+                ResponseCacheModel.namespace == namespace,
+                ResponseCacheModel.embedding.isnot(None)
+            ).all()
+
+            return [{"embedding": e.embedding, "response": e.response} for e in entries]
+        finally:
+            session.close()
+
+    def save_cached_response(
+        self,
+        key: str,
+        namespace: str,
+        response: str,
+        embedding: Optional[bytes] = None
+    ):
+        """Insert or replace a cached response"""
+        session = self.get_session()
+        try:
+            session.merge(ResponseCacheModel(
+                key=key,
+                namespace=namespace,
+                embedding=embedding,
+                response=response,
+                created_at=datetime.now()
+            ))
+            session.commit()
         finally:
             session.close()
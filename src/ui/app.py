@@ -3,15 +3,25 @@ Prompt Forge Studio - Streamlit UI
 """
 import streamlit as st
 from datetime import datetime
-from typing import Optional
-import plotly.graph_objects as go
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from src.config import config
-from src.api.anthropic_client import AnthropicClient
+from src.config import get_config, set_api_key
+from src.api.response_cache import response_cache
 from src.db.database import Database
-from src.core.analyzer import PromptAnalyzer
-from src.core.tester import PromptTester
 
+# plotly, the Anthropic SDK and the analyzer/tester are imported where they
+# are used, so pages that don't need them load faster on a cold start
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+    from src.api.anthropic_client import AnthropicClient
+
+
+# Versions / test cases listed per "Load more" step
+PAGE_SIZE = 10
+
+# Seconds a batch-mode run blocks the page before the batch is left to
+# finish server-side; its ID is kept in session state to fetch results later
+BATCH_TIMEOUT = 120
 
 # Page configuration
 st.set_page_config(
@@ -25,10 +35,10 @@ st.set_page_config(
 def init_session_state():
     """Initialize session state variables"""
     if 'db' not in st.session_state:
-        st.session_state.db = Database()
+        st.session_state.db = get_database()
 
     if 'api_configured' not in st.session_state:
-        st.session_state.api_configured = config.validate()
+        st.session_state.api_configured = get_config().validate()
 
     if 'current_prompt_id' not in st.session_state:
         st.session_state.current_prompt_id = None
@@ -36,11 +46,125 @@ def init_session_state():
     if 'current_version_id' not in st.session_state:
         st.session_state.current_version_id = None
 
+    # Number of versions / test cases listed; grown by "Load more"
+    if 'history_limit' not in st.session_state:
+        st.session_state.history_limit = PAGE_SIZE
+
+    if 'test_case_limit' not in st.session_state:
+        st.session_state.test_case_limit = PAGE_SIZE
+
+    # Batch IDs (by stage) of batch-mode runs that outlived BATCH_TIMEOUT,
+    # keyed by job ("analysis-<version id>", "tests-<version id>")
+    if 'pending_batches' not in st.session_state:
+        st.session_state.pending_batches = {}
+
+
+@st.cache_resource
+def get_database() -> Database:
+    """Build one Database (engine and connection pool) shared across sessions and reruns"""
+    return Database()
+
+
+@st.cache_resource
+def get_anthropic_client(api_key: Optional[str]) -> "AnthropicClient":
+    """Build one AnthropicClient per API key, shared across sessions and reruns"""
+    from src.api.anthropic_client import AnthropicClient
+
+    return AnthropicClient(api_key=api_key)
+
+
+@st.cache_resource
+def _data_revision() -> Dict[str, int]:
+    """Process-wide counter bumped on every write made through the UI"""
+    return {"rev": 0}
+
+
+def data_rev() -> int:
+    """Current data revision; part of every cached loader's key"""
+    return _data_revision()["rev"]
+
+
+def bump_data_rev():
+    """Invalidate the cached loaders after a write"""
+    _data_revision()["rev"] += 1
+
+
+@st.cache_data(ttl=60)
+def _list_prompts(rev: int, include_current: bool = False) -> List[Dict[str, Any]]:
+    """All prompts, cached per data revision"""
+    return get_database().list_prompts(include_current=include_current)
+
+
+@st.cache_data(ttl=60)
+def _get_current_version(prompt_id: int, rev: int) -> Optional[Dict[str, Any]]:
+    """Current version of a prompt, cached per data revision"""
+    return get_database().get_current_version(prompt_id)
+
+
+@st.cache_data(ttl=300)
+def _load_prompt_bundle(prompt_id: int, rev: int) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Prompt and its current version for the editor, cached per data revision"""
+    db = get_database()
+    return db.get_prompt(prompt_id), db.get_current_version(prompt_id)
 
-def get_client() -> Optional[AnthropicClient]:
+
+@st.cache_data(ttl=60)
+def _list_versions(prompt_id: int, rev: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Versions of a prompt (newest first), cached per data revision"""
+    return get_database().list_versions(prompt_id, limit=limit)
+
+
+@st.cache_data(ttl=60)
+def _get_test_cases(prompt_id: int, rev: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Test cases of a prompt, cached per data revision"""
+    return get_database().get_test_cases(prompt_id, limit=limit)
+
+
+# Loaders are cached in memory only: the revision restarts at 0 with the
+# process, so entries persisted to disk could be served stale after a restart.
+# Analyses and test results themselves already persist in the database.
+@st.cache_data(ttl=60)
+def _get_analyses(version_id: int, rev: int) -> List[Dict[str, Any]]:
+    """Analyses of a version, cached per data revision"""
+    return get_database().get_analyses(version_id)
+
+
+@st.cache_data(ttl=60)
+def _summarize_test_results(version_id: int, rev: int) -> Dict[str, Any]:
+    """Test result counts and average score of a version, cached per data revision"""
+    return get_database().summarize_version(version_id, pass_threshold=70)
+
+
+@st.cache_data(max_entries=32)
+def _radar_fig(scores: Tuple[Tuple[str, float], ...]) -> "go.Figure":
+    """Radar chart of (dimension, score) pairs, cached per distinct set of scores"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=[score for _, score in scores],
+        theta=[dimension for dimension, _ in scores],
+        fill='toself',
+        name='Scores'
+    ))
+
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+        showlegend=False,
+        title="Quality Dimensions"
+    )
+    return fig
+
+
+def _show_more(limit_key: str):
+    """Button callback: list another page of items (runs before the rerun)"""
+    st.session_state[limit_key] += PAGE_SIZE
+
+
+def get_client() -> Optional["AnthropicClient"]:
     """Get configured Anthropic client"""
     try:
-        return AnthropicClient()
+        return get_anthropic_client(get_config().ANTHROPIC_API_KEY)
     except Exception as e:
         st.error(f"Error initializing API client: {str(e)}")
         return None
@@ -50,26 +174,42 @@ def render_sidebar():
     """Render sidebar with navigation and prompts list"""
     with st.sidebar:
         st.title("🔨 Prompt Forge Studio")
-        st.caption(f"v{config.APP_VERSION}")
+        st.caption(f"v{get_config().APP_VERSION}")
 
         # API Configuration
         with st.expander("⚙️ API Configuration", expanded=not st.session_state.api_configured):
             api_key = st.text_input(
                 "Anthropic API Key",
                 type="password",
-                value=config.ANTHROPIC_API_KEY or "",
+                value=get_config().ANTHROPIC_API_KEY or "",
                 help="Enter your Anthropic API key"
             )
 
             if st.button("Save API Key"):
-                config.set_api_key(api_key)
-                st.session_state.api_configured = config.validate()
+                previous_key = get_config().ANTHROPIC_API_KEY
+                set_api_key(api_key)
+                if previous_key and previous_key != api_key:
+                    from src.api.anthropic_client import release_api_key
+
+                    # Close the SDK clients (and connection pools) pooled for the old key
+                    release_api_key(previous_key)
+                get_anthropic_client.clear()
+                st.session_state.api_configured = get_config().validate()
                 if st.session_state.api_configured:
                     st.success("API key saved!")
                     st.rerun()
                 else:
                     st.error("Please enter a valid API key")
 
+            cache_stats = response_cache.stats()
+            st.caption(
+                f"Response cache: {cache_stats['size']} entries, "
+                f"{cache_stats['hits']} hits / {cache_stats['misses']} misses"
+            )
+            if st.button("Clear Response Cache"):
+                response_cache.clear()
+                st.rerun()
+
         st.divider()
 
         # Navigation
@@ -87,35 +227,53 @@ def render_sidebar():
         if st.button("➕ New Prompt", use_container_width=True):
             st.session_state.show_new_prompt_dialog = True
 
-        prompts = st.session_state.db.list_prompts()
-
-        if prompts:
-            for prompt in prompts:
-                col1, col2 = st.columns([4, 1])
-                with col1:
-                    if st.button(
-                        f"{prompt['name']}",
-                        key=f"prompt_{prompt['id']}",
-                        use_container_width=True
-                    ):
-                        st.session_state.current_prompt_id = prompt['id']
-                        version = st.session_state.db.get_current_version(prompt['id'])
-                        if version:
-                            st.session_state.current_version_id = version['id']
-                        st.rerun()
-                with col2:
-                    if st.button("🗑️", key=f"delete_{prompt['id']}"):
-                        st.session_state.db.delete_prompt(prompt['id'])
-                        if st.session_state.current_prompt_id == prompt['id']:
-                            st.session_state.current_prompt_id = None
-                            st.session_state.current_version_id = None
-                        st.rerun()
-        else:
-            st.info("No prompts yet. Create one to get started!")
+        render_prompt_list()
 
         return page
 
 
+@st.fragment
+def render_prompt_list():
+    """
+    Render the sidebar's prompt list
+
+    Runs as a fragment, so it is not rebuilt when the editor fragment reruns.
+    Selecting or deleting a prompt reruns the whole app.
+    """
+    prompts = _list_prompts(data_rev())
+
+    if not prompts:
+        st.info("No prompts yet. Create one to get started!")
+        return
+
+    # One selectbox and one delete button, however many prompts there are
+    names = {prompt['id']: prompt['name'] for prompt in prompts}
+    prompt_ids = list(names)
+    current_id = st.session_state.current_prompt_id
+
+    selected_id = st.selectbox(
+        "Prompts",
+        options=prompt_ids,
+        index=prompt_ids.index(current_id) if current_id in names else None,
+        format_func=names.get,
+        placeholder="Select a prompt"
+    )
+
+    if selected_id is not None and selected_id != current_id:
+        st.session_state.current_prompt_id = selected_id
+        version = _get_current_version(selected_id, data_rev())
+        if version:
+            st.session_state.current_version_id = version['id']
+        st.rerun()
+
+    if st.button("🗑️ Delete selected", disabled=current_id not in names, use_container_width=True):
+        st.session_state.db.delete_prompt(current_id)
+        bump_data_rev()
+        st.session_state.current_prompt_id = None
+        st.session_state.current_version_id = None
+        st.rerun()
+
+
 def render_new_prompt_dialog():
     """Render dialog for creating new prompt"""
     if st.session_state.get('show_new_prompt_dialog', False):
@@ -139,8 +297,9 @@ def render_new_prompt_dialog():
                             description=description,
                             content=initial_content
                         )
+                        bump_data_rev()
                         st.session_state.current_prompt_id = prompt_id
-                        version = st.session_state.db.get_current_version(prompt_id)
+                        version = _get_current_version(prompt_id, data_rev())
                         if version:
                             st.session_state.current_version_id = version['id']
                         st.session_state.show_new_prompt_dialog = False
@@ -164,8 +323,7 @@ def render_editor_page():
         return
 
     # Get current prompt and version
-    prompt = st.session_state.db.get_prompt(st.session_state.current_prompt_id)
-    version = st.session_state.db.get_current_version(st.session_state.current_prompt_id)
+    prompt, version = _load_prompt_bundle(st.session_state.current_prompt_id, data_rev())
 
     if not prompt or not version:
         st.error("Error loading prompt")
@@ -185,12 +343,30 @@ def render_editor_page():
 
     # Editor
     st.divider()
+    render_editor_body(version)
+
+
+@st.fragment
+def render_editor_body(version: Dict[str, Any]):
+    """
+    Render the editor, quick actions, save dialog and version history
+
+    Runs as a fragment: editing the prompt or toggling these panels reruns
+    only this part of the page, not the sidebar.
+
+    Args:
+        version: Version being edited
+    """
+    # Seed the widget state once per version and pass no value afterwards,
+    # so reruns neither resend the content nor clobber unsaved edits
+    editor_key = f"editor_content_{version['id']}"
+    if editor_key not in st.session_state:
+        st.session_state[editor_key] = version['content']
 
     prompt_content = st.text_area(
         "System Prompt",
-        value=version['content'],
         height=400,
-        key="prompt_editor",
+        key=editor_key,
         help="Write your system prompt here"
     )
 
@@ -236,6 +412,7 @@ def render_editor_page():
                         content=prompt_content,
                         notes=notes
                     )
+                    bump_data_rev()
                     st.session_state.current_version_id = version_id
                     st.session_state.show_save_version = False
                     st.success("New version saved!")
@@ -251,10 +428,12 @@ def render_editor_page():
         st.divider()
         st.subheader("Version History")
 
-        versions = st.session_state.db.list_versions(st.session_state.current_prompt_id)
+        # Fetch one extra row to know whether there is more to load
+        limit = st.session_state.history_limit
+        versions = _list_versions(st.session_state.current_prompt_id, data_rev(), limit=limit + 1)
 
-        for v in versions:
-            with st.expander(f"Version {v['version']} - {v['created_at'].strftime('%Y-%m-%d %H:%M')}"):
+        for v in versions[:limit]:
+            with st.expander(f"Version {v['version']} - {v['created_at_fmt']}"):
                 st.text(v['content'])
                 if v['notes']:
                     st.caption(f"Notes: {v['notes']}")
@@ -263,6 +442,9 @@ def render_editor_page():
                     st.session_state.current_version_id = v['id']
                     st.rerun()
 
+        if len(versions) > limit:
+            st.button("Load more versions", on_click=_show_more, args=("history_limit",))
+
         if st.button("Close History"):
             st.session_state.show_history = False
             st.rerun()
@@ -276,7 +458,7 @@ def render_analysis_page():
         st.info("Select a prompt and configure your API key to run analysis.")
         return
 
-    version = st.session_state.db.get_current_version(st.session_state.current_prompt_id)
+    version = _get_current_version(st.session_state.current_prompt_id, data_rev())
     if not version:
         st.error("No version selected")
         return
@@ -290,19 +472,44 @@ def render_analysis_page():
         help="Choose the type of analysis to perform"
     )
 
+    batch_mode = analysis_type == "Comprehensive" and st.toggle(
+        "💸 Batch mode",
+        help="Send the dimension analyses through the Message Batches API: half the price, but results can take minutes"
+    )
+
+    batch_job = f"analysis-{version['id']}"
+    if batch_mode and batch_job in st.session_state.pending_batches:
+        st.info("A batch for this version is still processing. Run the analysis again to fetch its results.")
+
     if st.button("🔍 Run Analysis", use_container_width=True):
         client = get_client()
         if not client:
             return
 
+        from src.core.analyzer import PromptAnalyzer
+
         analyzer = PromptAnalyzer(client, st.session_state.db)
 
-        with st.spinner("Analyzing prompt..."):
-            if analysis_type == "Comprehensive":
-                results = analyzer.analyze_all_dimensions(
-                    version['content'],
-                    version_id=version['id']
-                )
+        if analysis_type == "Comprehensive":
+            batch_ids = st.session_state.pending_batches.setdefault(batch_job, {}) if batch_mode else None
+            try:
+                with st.spinner("Waiting for the batch..." if batch_mode else "Analyzing prompt..."):
+                    results = analyzer.analyze_all_dimensions(
+                        version['content'],
+                        version_id=version['id'],
+                        mode="batch" if batch_mode else "online",
+                        batch_timeout=BATCH_TIMEOUT,
+                        batch_ids=batch_ids
+                    )
+            except TimeoutError:
+                st.warning(f"Batch {batch_ids['analysis']} is still processing. Run the analysis again later to fetch its results.")
+            except Exception:
+                # Don't resume a batch that failed or expired
+                st.session_state.pending_batches.pop(batch_job, None)
+                raise
+            else:
+                st.session_state.pending_batches.pop(batch_job, None)
+                bump_data_rev()
 
                 # Show summary
                 summary = analyzer.get_quality_summary(results)
@@ -311,54 +518,37 @@ def render_analysis_page():
 
                 # Radar chart
                 if summary['dimension_scores']:
-                    scores = summary['dimension_scores']
-                    categories = list(scores.keys())
-                    values = list(scores.values())
-
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatterpolar(
-                        r=values,
-                        theta=categories,
-                        fill='toself',
-                        name='Scores'
-                    ))
-
-                    fig.update_layout(
-                        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-                        showlegend=False,
-                        title="Quality Dimensions"
-                    )
-
-                    st.plotly_chart(fig, use_container_width=True)
+                    st.plotly_chart(_radar_fig(tuple(summary['dimension_scores'].items())), use_container_width=True)
 
                 # Show detailed results
                 for result in results:
                     with st.expander(f"{result['type'].title()} Analysis - Score: {result['score'] if result['score'] else 'N/A'}"):
                         st.markdown(result['content'])
 
-            else:
-                # Single dimension analysis
-                analysis_map = {
-                    "Clarity": analyzer.analyze_clarity,
-                    "Completeness": analyzer.analyze_completeness,
-                    "Efficiency": analyzer.analyze_efficiency,
-                    "Safety": analyzer.analyze_safety
-                }
-
-                result = analysis_map[analysis_type](version['content'], version_id=version['id'])
-
-                st.metric(f"{analysis_type} Score", f"{result['score']}/100" if result['score'] else "N/A")
-                st.markdown(result['content'])
+        else:
+            # Single dimension analysis, streamed as it is generated
+            completed = {}
+            score_slot = st.empty()
+            st.write_stream(analyzer.stream_analysis(
+                analysis_type.lower(),
+                version['content'],
+                version_id=version['id'],
+                on_complete=completed.update
+            ))
+            bump_data_rev()
+
+            score = completed.get('score')
+            score_slot.metric(f"{analysis_type} Score", f"{score}/100" if score else "N/A")
 
     # Show previous analyses
     st.divider()
     st.subheader("Previous Analyses")
 
-    analyses = st.session_state.db.get_analyses(version['id'])
+    analyses = _get_analyses(version['id'], data_rev())
 
     if analyses:
         for analysis in analyses:
-            with st.expander(f"{analysis['analysis_type'].title()} - {analysis['created_at'].strftime('%Y-%m-%d %H:%M')}"):
+            with st.expander(f"{analysis['analysis_type'].title()} - {analysis['created_at_fmt']}"):
                 st.metric("Score", f"{analysis['score']}/100" if analysis['score'] else "N/A")
                 st.markdown(analysis['content'])
     else:
@@ -373,7 +563,7 @@ def render_testing_page():
         st.info("Select a prompt and configure your API key to run tests.")
         return
 
-    version = st.session_state.db.get_current_version(st.session_state.current_prompt_id)
+    version = _get_current_version(st.session_state.current_prompt_id, data_rev())
     if not version:
         st.error("No version selected")
         return
@@ -404,82 +594,121 @@ def render_testing_page():
                             expected_output=expected_output if expected_output else None,
                             evaluation_criteria=criteria
                         )
+                        bump_data_rev()
                         st.success(f"Created test case: {name}")
                         st.rerun()
                     else:
                         st.error("Please fill in all required fields")
 
-        # List existing test cases
-        test_cases = st.session_state.db.get_test_cases(st.session_state.current_prompt_id)
+        # List existing test cases, fetching one extra row to know whether there is more
+        limit = st.session_state.test_case_limit
+        test_cases = _get_test_cases(st.session_state.current_prompt_id, data_rev(), limit=limit + 1)
 
         if test_cases:
-            for tc in test_cases:
+            for tc in test_cases[:limit]:
                 with st.expander(f"📋 {tc['name']}"):
-                    st.text_area("Input", value=tc['input_text'], disabled=True, key=f"input_{tc['id']}")
+                    # Read-only text is shown with st.code, which registers no widget state
+                    st.caption("Input")
+                    st.code(tc['input_text'], language=None, wrap_lines=True)
                     if tc['expected_output']:
-                        st.text_area("Expected Output", value=tc['expected_output'], disabled=True, key=f"expected_{tc['id']}")
-                    st.text_area("Criteria", value=tc['evaluation_criteria'], disabled=True, key=f"criteria_{tc['id']}")
+                        st.caption("Expected Output")
+                        st.code(tc['expected_output'], language=None, wrap_lines=True)
+                    st.caption("Criteria")
+                    st.code(tc['evaluation_criteria'], language=None, wrap_lines=True)
 
                     if st.button(f"Delete Test Case", key=f"delete_tc_{tc['id']}"):
                         st.session_state.db.delete_test_case(tc['id'])
+                        bump_data_rev()
                         st.rerun()
+
+            if len(test_cases) > limit:
+                st.button("Load more test cases", on_click=_show_more, args=("test_case_limit",))
         else:
             st.info("No test cases yet. Create one above!")
 
     with tab2:
         st.subheader("Run Tests")
 
-        test_cases = st.session_state.db.get_test_cases(st.session_state.current_prompt_id)
+        test_cases = _get_test_cases(st.session_state.current_prompt_id, data_rev())
 
         if not test_cases:
             st.warning("Create test cases first before running tests.")
             return
 
+        batch_mode = st.toggle(
+            "💸 Batch mode",
+            key="test_batch_mode",
+            help="Send generations and evaluations through the Message Batches API: half the price, but results can take minutes"
+        )
+
+        batch_job = f"tests-{version['id']}"
+        if batch_mode and batch_job in st.session_state.pending_batches:
+            st.info("Batches for this version are still processing. Run the tests again to fetch their results.")
+
         if st.button("▶️ Run All Tests", use_container_width=True):
             client = get_client()
             if not client:
                 return
 
-            tester = PromptTester(client, st.session_state.db)
-
-            with st.spinner("Running tests..."):
-                results = tester.run_all_tests(
-                    prompt_id=st.session_state.current_prompt_id,
-                    version_id=version['id'],
-                    system_prompt=version['content']
-                )
+            from src.core.tester import PromptTester
 
-                # Show summary
-                summary = tester.get_test_summary(version['id'])
-
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Total Tests", summary['total_tests'])
-                with col2:
-                    st.metric("Passed", summary['passed'])
-                with col3:
-                    st.metric("Average Score", f"{summary['average_score']:.1f}" if summary['average_score'] else "N/A")
-
-                # Show individual results
-                st.divider()
-                for result in results:
-                    with st.expander(f"📊 {result['test_name']} - Score: {result['score'] if result['score'] else 'N/A'}"):
-                        st.subheader("Output")
-                        st.text_area("", value=result['output'], disabled=True, key=f"output_{result['test_case_id']}")
+            tester = PromptTester(client, st.session_state.db)
 
-                        st.subheader("Evaluation")
-                        st.markdown(result['evaluation'])
+            batch_ids = st.session_state.pending_batches.setdefault(batch_job, {}) if batch_mode else None
+            with st.spinner("Waiting for the batches..." if batch_mode else "Running tests..."):
+                try:
+                    results = tester.run_all_tests(
+                        prompt_id=st.session_state.current_prompt_id,
+                        version_id=version['id'],
+                        system_prompt=version['content'],
+                        mode="batch" if batch_mode else "online",
+                        batch_timeout=BATCH_TIMEOUT,
+                        batch_ids=batch_ids
+                    )
+                except TimeoutError:
+                    st.warning(
+                        f"Batch {list(batch_ids.values())[-1]} is still processing. "
+                        "Run the tests again later to fetch its results."
+                    )
+                except Exception:
+                    # Don't resume a batch that failed or expired
+                    st.session_state.pending_batches.pop(batch_job, None)
+                    raise
+                else:
+                    st.session_state.pending_batches.pop(batch_job, None)
+                    bump_data_rev()
+
+                    # Show summary
+                    summary = tester.get_test_summary(version['id'])
+
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Total Tests", summary['total_tests'])
+                    with col2:
+                        st.metric("Passed", summary['passed'])
+                    with col3:
+                        st.metric("Average Score", f"{summary['average_score']:.1f}" if summary['average_score'] else "N/A")
+
+                    # Show individual results
+                    st.divider()
+                    for result in results:
+                        with st.expander(f"📊 {result['test_name']} - Score: {result['score'] if result['score'] else 'N/A'}"):
+                            st.subheader("Output")
+                            st.code(result['output'], language=None, wrap_lines=True)
+
+                            st.subheader("Evaluation")
+                            st.markdown(result['evaluation'])
 
         # Show previous test results
         st.divider()
         st.subheader("Previous Test Results")
 
-        summary = tester.get_test_summary(version['id'])
+        summary = _summarize_test_results(version['id'], data_rev())
 
-        if summary['total_tests'] > 0:
+        if summary['total'] > 0:
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total Tests", summary['total_tests'])
+                st.metric("Total Tests", summary['total'])
             with col2:
                 st.metric("Passed", summary['passed'])
             with col3:
@@ -495,18 +724,18 @@ def render_library_page():
     st.info("Feature coming soon: Reusable prompt components, templates, and shared prompts.")
 
     # Show all prompts with their stats
-    prompts = st.session_state.db.list_prompts()
+    prompts = _list_prompts(data_rev(), include_current=True)
 
     if prompts:
         for prompt in prompts:
             with st.expander(f"📄 {prompt['name']}"):
                 st.write(f"**Description:** {prompt['description'] or 'No description'}")
                 st.write(f"**Versions:** {prompt['current_version']}")
-                st.write(f"**Last Updated:** {prompt['updated_at'].strftime('%Y-%m-%d %H:%M')}")
+                st.write(f"**Last Updated:** {prompt['updated_at_fmt']}")
 
-                version = st.session_state.db.get_current_version(prompt['id'])
-                if version:
-                    st.text_area("Current Content", value=version['content'], disabled=True, key=f"lib_{prompt['id']}")
+                if prompt['current_content'] is not None:
+                    st.caption("Current Content")
+                    st.code(prompt['current_content'], language=None, wrap_lines=True)
 
 
 def main():